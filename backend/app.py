@@ -1,20 +1,49 @@
 """
 Main Flask Application
 PDF Anchor - Energy Provider Contract Auto-Fill System
+
+Entry points:
+    python app.py                               Development server
+    gunicorn -c gunicorn.conf.py app:app        Preloaded workers (see gunicorn.conf.py)
+    uvicorn asgi:application                    ASGI serving (see asgi.py)
+    flask --app app init-db                     Create missing tables
+
+Importing this module builds nothing: create_app() only wires the app
+(no database access), and the module-level `app` is loaded on first access
+by load_app(), which also creates tables (DB_AUTO_CREATE) and preloads
+fonts. Startup phases are timed and exported as metrics.
 """
+import time
+
+_import_started = time.perf_counter()
+
+import os
+
+import click
 from flask import Flask
+from flask.cli import with_appcontext
 from flask_cors import CORS
 from dotenv import load_dotenv
-import os
 
 # Load environment variables
 load_dotenv()
 
-from database import db
+from database import db, init_schema
 from config import config
+from routes import providers_bp, anchors_bp, pdfs_bp, autofill_bp, jobs_bp, metrics_bp
+from services.job_queue import job_queue
+from services.page_cache import page_cache
+from services.document_pool import document_pool
+from services.storage import blob_store
+from services.result_cache import fill_cache
+from services.metrics import metrics
+from services.text_layout import preload_fonts
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
 
 def create_app(config_name='default'):
-    """Application factory"""
+    """Application factory (no database access; see load_app)"""
     app = Flask(__name__)
     
     # Load configuration
@@ -22,6 +51,12 @@ def create_app(config_name='default'):
     
     # Initialize extensions
     db.init_app(app)
+    metrics.init_app(app)
+    job_queue.init_app(app)
+    page_cache.init_app(app)
+    fill_cache.init_app(app)
+    document_pool.init_app(app)
+    blob_store.init_app(app)
     
     # Enable CORS for frontend
     CORS(app, origins=[
@@ -29,13 +64,13 @@ def create_app(config_name='default'):
         "http://127.0.0.1:3000"
     ])
     
-    # Import and register blueprints
-    from routes import providers_bp, anchors_bp, pdfs_bp, autofill_bp
-    
+    # Register blueprints
     app.register_blueprint(providers_bp, url_prefix='/api')
     app.register_blueprint(anchors_bp, url_prefix='/api')
     app.register_blueprint(pdfs_bp, url_prefix='/api')
     app.register_blueprint(autofill_bp, url_prefix='/api')
+    app.register_blueprint(jobs_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp, url_prefix='/api')
     
     # Root endpoint - Simple status page
     @app.route('/', methods=['GET'])
@@ -93,20 +128,78 @@ def create_app(config_name='default'):
     def health_check():
         return {'status': 'healthy', 'message': 'PDF Anchor API is running'}
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-        print("✅ Database tables created successfully!")
+    app.cli.add_command(init_db_command)
+    
+    return app
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create missing database tables"""
+    db.create_all()
+    click.echo('✅ Database tables created successfully!')
+
+
+def preload():
+    """
+    Load what every worker needs before serving: fonts with their glyph
+    advances, and Pillow for WebP pages. In a preforking master (gunicorn
+    preload_app) workers then share them copy-on-write.
+    """
+    preload_fonts()
+    import PIL.Image  # noqa: F401
+
+
+def load_app(config_name=None):
+    """
+    Build the serving app: create_app, create missing tables (DB_AUTO_CREATE)
+    and preload shared resources.
+    
+    Phase durations are kept in app.extensions['startup'] and exported as
+    the pdf_anchor_startup_seconds metric.
+    """
+    startup = {'imports': IMPORT_SECONDS}
+    
+    started = time.perf_counter()
+    app = create_app(config_name or os.getenv('FLASK_ENV', 'development'))
+    startup['create_app'] = time.perf_counter() - started
+    
+    if app.config['DB_AUTO_CREATE']:
+        started = time.perf_counter()
+        init_schema(app)
+        startup['schema'] = time.perf_counter() - started
     
+    started = time.perf_counter()
+    preload()
+    startup['preload'] = time.perf_counter() - started
+    
+    for phase, seconds in startup.items():
+        metrics.startup.set(seconds, phase)
+    app.extensions['startup'] = startup
+    app.logger.info('Startup: %s', format_startup(startup))
     return app
 
 
-# Create app instance
-app = create_app(os.getenv('FLASK_ENV', 'development'))
+def format_startup(startup: dict) -> str:
+    """Startup phases as "imports 512ms, create_app 12ms, ..." """
+    return ', '.join(f'{phase} {seconds * 1000:.0f}ms' for phase, seconds in startup.items())
+
+
+def __getattr__(name):
+    """Module-level `app` (gunicorn app:app, flask --app app), built on first access"""
+    if name == 'app':
+        application = globals()['app'] = load_app()
+        return application
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 if __name__ == '__main__':
+    app = load_app()
     print("🚀 Starting PDF Anchor Backend Server...")
     print(f"📍 Running on http://127.0.0.1:5001")
     print(f"📦 Database: {app.config['SQLALCHEMY_DATABASE_URI']}")
+    print(f"⏱️  Startup: {format_startup(app.extensions['startup'])}")
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        job_queue.start()  # Only in the reloader's serving child, not the file watcher
     app.run(debug=True, port=5001, host='0.0.0.0')
@@ -0,0 +1,249 @@
+"""
+ASGI Entry Point - Serve the Flask app from an event loop
+PDF Anchor - Energy Provider Contract Auto-Fill System
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5001
+
+Client I/O happens on the event loop: request bodies are received as they
+arrive (spooled to memory, then to a temp file) and responses are sent as
+fast as the client reads them. A request only takes one of ASGI_THREADS
+pool threads once its body is complete. The unchanged Flask routes run
+there, including DB access and PyMuPDF work. Long responses (downloads,
+streamed ZIPs) are produced one chunk at a time in the same pool. One
+process therefore holds hundreds of slow connections while at most
+ASGI_THREADS requests are working.
+"""
+import asyncio
+import contextvars
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app
+
+
+class ASGIAdapter:
+    """ASGI application running a WSGI app in a bounded thread pool"""
+
+    def __init__(self, wsgi_app, threads: int = 8, body_memory_bytes: int = 1024 * 1024,
+                 chunk_bytes: int = 64 * 1024, max_body_bytes: int = None, on_startup: list = None):
+        """
+        Args:
+            wsgi_app: WSGI callable (e.g. the Flask app)
+            threads: Requests processed concurrently
+            body_memory_bytes: Request body size kept in memory before spooling to disk
+            chunk_bytes: Response bytes produced per thread pool hop
+            max_body_bytes: Larger bodies are not read; the app sees their length and rejects them (413)
+            on_startup: Callables run once at lifespan startup (e.g. starting job workers)
+        """
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi')
+        self.body_memory_bytes = body_memory_bytes
+        self.chunk_bytes = chunk_bytes
+        self.max_body_bytes = max_body_bytes
+        self.on_startup = on_startup or []
+
+    @classmethod
+    def for_flask(cls, flask_app):
+        """Adapter sized from ASGI_* config (and MAX_CONTENT_LENGTH) that starts the job workers"""
+        return cls(
+            flask_app,
+            threads=flask_app.config['ASGI_THREADS'],
+            body_memory_bytes=flask_app.config['ASGI_BODY_MEMORY_BYTES'],
+            chunk_bytes=flask_app.config['ASGI_RESPONSE_CHUNK_BYTES'],
+            max_body_bytes=flask_app.config['MAX_CONTENT_LENGTH'],
+            on_startup=[flask_app.extensions['job_queue'].start]
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        received = await self._receive_body(scope, receive)
+        if received is None:
+            return  # Client disconnected before sending the whole body
+
+        body, content_length = received
+        try:
+            await self._respond(self._environ(scope, body, content_length), send)
+        finally:
+            body.close()
+
+    # ============ REQUEST ============
+
+    async def _receive_body(self, scope, receive):
+        """
+        Read the request body without holding a thread.
+
+        Returns:
+            Tuple of (file positioned at 0, body length), or None on disconnect
+        """
+        declared = None
+        for name, value in scope['headers']:
+            if name == b'content-length' and value.isdigit():
+                declared = int(value)
+
+        body = tempfile.SpooledTemporaryFile(max_size=self.body_memory_bytes)
+        if self.max_body_bytes is not None and declared is not None and declared > self.max_body_bytes:
+            return body, declared  # Rejected by the app without reading it
+
+        length = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+
+            chunk = message.get('body', b'')
+            length += len(chunk)
+            if self.max_body_bytes is not None and length > self.max_body_bytes:
+                # Chunked upload grew past the limit: stop reading, let the app reject it
+                body.seek(0)
+                body.truncate()
+                return body, length
+            body.write(chunk)
+
+            if not message.get('more_body', False):
+                break
+
+        body.seek(0)
+        return body, length
+
+    @staticmethod
+    def _environ(scope, body, content_length: int) -> dict:
+        """WSGI environ for an ASGI HTTP scope"""
+        root_path = scope.get('root_path', '')
+        path = scope['path']
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client')
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+            'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1] or 80),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0] if client else '',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.input_terminated': True,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False
+        }
+
+        for name, value in scope['headers']:
+            name = name.decode('latin-1').upper().replace('-', '_')
+            key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{name}'
+            value = value.decode('latin-1')
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+
+        # The body is complete, so its length is known even for chunked uploads
+        environ['CONTENT_LENGTH'] = str(content_length)
+        return environ
+
+    # ============ RESPONSE ============
+
+    async def _respond(self, environ: dict, send):
+        """Run the app in the pool and send its response as the client reads it"""
+        loop = asyncio.get_running_loop()
+
+        # Streamed bodies resume on other pool threads; keep the request's context
+        context = contextvars.copy_context()
+        response = _WSGIResponse(self.wsgi_app, environ, self.chunk_bytes)
+
+        def run(method):
+            return loop.run_in_executor(self.executor, context.run, method)
+
+        try:
+            chunk = await run(response.begin)
+            await send({
+                'type': 'http.response.start',
+                'status': int(response.status.split(' ', 1)[0]),
+                'headers': [
+                    (name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in response.headers
+                ]
+            })
+            response.headers_sent = True
+            while True:
+                more_body = not response.finished
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+                if not more_body:
+                    break
+                chunk = await run(response.read)
+        finally:
+            # Runs close callbacks (metrics, open files) even if the client went away
+            await run(response.close)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                for callback in self.on_startup:
+                    callback()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+class _WSGIResponse:
+    """One WSGI call; begin(), read() and close() run in the thread pool"""
+
+    def __init__(self, wsgi_app, environ: dict, chunk_bytes: int):
+        self.wsgi_app = wsgi_app
+        self.environ = environ
+        self.chunk_bytes = chunk_bytes
+        self.status = None
+        self.headers = None
+        self.finished = False
+        self.headers_sent = False
+        self._iterable = None
+        self._iterator = None
+        self._written = []  # Output of the legacy write() callable
+
+    def start_response(self, status, headers, exc_info=None):
+        if exc_info and self.headers_sent:
+            raise exc_info[1].with_traceback(exc_info[2])
+        self.status = status
+        self.headers = headers
+        return self._written.append
+
+    def begin(self) -> bytes:
+        """Call the app and return the first body chunk (start_response has run by then)"""
+        self._iterable = self.wsgi_app(self.environ, self.start_response)
+        self._iterator = iter(self._iterable)
+        return self.read()
+
+    def read(self) -> bytes:
+        """Next body bytes, about chunk_bytes at a time (sets finished at the end)"""
+        parts, self._written = self._written, []
+        size = sum(len(part) for part in parts)
+        while size < self.chunk_bytes:
+            try:
+                chunk = next(self._iterator)
+            except StopIteration:
+                self.finished = True
+                break
+            if chunk:
+                parts.append(chunk)
+                size += len(chunk)
+        return b''.join(parts)
+
+    def close(self):
+        if hasattr(self._iterable, 'close'):
+            self._iterable.close()
+
+
+application = ASGIAdapter.for_flask(app)
@@ -0,0 +1,13 @@
+"""
+Benchmarks - Throughput, latency and memory of the PDF service and API hot paths
+
+Usage (from backend/):
+    python -m benchmarks                      # Full matrix, writes benchmarks/results/<timestamp>.json
+    python -m benchmarks --quick              # Small matrix for a fast check
+    python -m benchmarks --group api          # Only the Flask endpoints
+    python -m benchmarks --filter text_hash   # Only cases whose name contains a string
+    python -m benchmarks compare BASE.json NEW.json
+
+Each case runs in a fresh process so peak RSS belongs to that case alone.
+API cases use the Flask test client against a temporary SQLite database.
+"""
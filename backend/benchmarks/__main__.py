@@ -0,0 +1,84 @@
+"""
+Benchmark CLI - python -m benchmarks [--quick] [--group G] [--filter S] [--output PATH]
+                python -m benchmarks compare BASE.json NEW.json [--threshold 0.10]
+"""
+import argparse
+import os
+import sys
+
+# Run from backend/ so the app modules import as they do under Flask
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import api_cases, service_cases
+from benchmarks.harness import compare, run_case, run_isolated, write_results
+
+
+def _run(args) -> int:
+    cases = []
+    if args.group in ('all', 'service'):
+        cases += service_cases.cases(args.quick)
+    if args.group in ('all', 'api'):
+        cases += api_cases.cases(args.quick)
+    if args.filter:
+        cases = [case for case in cases if args.filter in case.key]
+
+    if not cases:
+        print('No benchmark cases selected')
+        return 1
+
+    print(f'{"case":<72} {"iter":>5} {"p50 ms":>9} {"p99 ms":>9} {"ops/s":>9} {"peak MB":>8}')
+    results = []
+    failed = False
+    for case in cases:
+        result = run_case(case, args.min_time) if args.no_isolate else run_isolated(case, args.min_time)
+        results.append(result)
+        if 'error' in result:
+            failed = True
+            print(f'{case.key:<72} ERROR {result["error"]}')
+        else:
+            print(f'{case.key:<72} {result["iterations"]:>5} {result["p50Ms"]:>9.2f} '
+                  f'{result["p99Ms"]:>9.2f} {result["throughputPerSecond"]:>9.2f} {result["peakRssMb"]:>8.1f}')
+
+    path = write_results(results, args.output, settings={
+        'quick': args.quick,
+        'group': args.group,
+        'filter': args.filter,
+        'minTime': args.min_time,
+        'isolated': not args.no_isolate
+    })
+    print(f'\nResults written to {path}')
+    return 1 if failed else 0
+
+
+def _compare(args) -> int:
+    rows = compare(args.base, args.new, args.threshold)
+    print(f'{"case":<72} {"base ms":>9} {"new ms":>9} {"change":>8}')
+    for key, before, after, ratio, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f'{key:<72} {before:>9.2f} {after:>9.2f} {(ratio - 1) * 100:>+7.1f}%{flag}')
+    return 1 if any(row[4] for row in rows) else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='PDF Anchor benchmarks')
+    parser.add_argument('--quick', action='store_true', help='Small documents only')
+    parser.add_argument('--group', choices=('all', 'service', 'api'), default='all')
+    parser.add_argument('--filter', help='Only cases whose key contains this string')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--min-time', type=float, default=1.0, help='Seconds to time each case (default 1.0)')
+    parser.add_argument('--no-isolate', action='store_true',
+                        help='Run cases in this process (faster; peak RSS is then cumulative)')
+
+    subparsers = parser.add_subparsers(dest='command')
+    compare_parser = subparsers.add_parser('compare', help='Compare two results files')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='p50 increase reported as a regression (default 0.10 = 10%%)')
+
+    args = parser.parse_args(argv)
+    return _compare(args) if args.command == 'compare' else _run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
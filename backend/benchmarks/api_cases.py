@@ -0,0 +1,152 @@
+"""
+API Cases - Endpoints through the Flask test client against temporary SQLite
+"""
+import io
+import json
+import os
+import tempfile
+
+from benchmarks.harness import Case
+from benchmarks.synthetic import CANVAS_WIDTH, CANVAS_HEIGHT, make_pdf, make_anchors, make_values
+
+
+def create_benchmark_app():
+    """
+    App on a throwaway SQLite database and upload folder.
+
+    Must run before anything imports config, since the database URL is
+    read from the environment when the Config class is defined.
+    """
+    folder = tempfile.mkdtemp(prefix='pdf-anchor-bench-')
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(folder, "bench.sqlite")}'
+
+    import config
+
+    class BenchmarkConfig(config.Config):
+        DEBUG = False
+        UPLOAD_FOLDER = folder
+        BLOB_FOLDER = os.path.join(folder, 'blobs')
+        JOB_FOLDER = os.path.join(folder, 'jobs')
+        PAGE_CACHE_FOLDER = os.path.join(folder, 'cache', 'pages')
+        PAGE_PRERENDER = False  # Upload cost only; render cases warm their own pages
+
+    config.config['benchmark'] = BenchmarkConfig
+
+    from app import create_app
+    from database import init_schema
+    app = create_app('benchmark')
+    init_schema(app)
+    return app
+
+
+def _check(response, status: int = 200):
+    """Fail the case loudly instead of timing error responses"""
+    if response.status_code != status:
+        raise RuntimeError(f'{response.request.path} returned {response.status_code}: '
+                           f'{response.get_data(as_text=True)[:200]}')
+    return response
+
+
+def _seed_pdf(client, pages: int, anchors: int) -> int:
+    """Create a provider with one PDF and its anchors; returns the PDF id"""
+    provider = _check(client.post('/api/providers', json={'name': 'Benchmark Energy'}), 201).get_json()
+    pdf = _check(client.post(
+        f'/api/providers/{provider["id"]}/pdfs',
+        data={
+            'pdf': (io.BytesIO(make_pdf(pages)), 'template.pdf'),
+            'canvasWidth': str(CANVAS_WIDTH),
+            'canvasHeight': str(CANVAS_HEIGHT)
+        },
+        content_type='multipart/form-data'
+    ), 201).get_json()
+    for anchor in make_anchors(anchors):
+        _check(client.post(f'/api/pdfs/{pdf["id"]}/anchors', json=anchor), 201)
+    return pdf['id']
+
+
+def autofill(pages: int, anchors: int):
+    """POST /api/autofill with the PDF and anchors in the request"""
+    client = create_benchmark_app().test_client()
+    pdf_bytes = make_pdf(pages)
+    anchors_json = json.dumps(make_anchors(anchors))
+
+    def operation():
+        _check(client.post('/api/autofill', data={
+            'pdf': (io.BytesIO(pdf_bytes), 'contract.pdf'),
+            'anchors': anchors_json
+        }, content_type='multipart/form-data'))
+    return operation
+
+
+def autofill_saved(pages: int, anchors: int):
+    """POST /api/autofill/pdf/<id> filling the saved template with values"""
+    client = create_benchmark_app().test_client()
+    pdf_id = _seed_pdf(client, pages, anchors)
+    values_json = json.dumps(make_values(anchors))
+
+    def operation():
+        _check(client.post(f'/api/autofill/pdf/{pdf_id}', data={'values': values_json},
+                           content_type='multipart/form-data'))
+    return operation
+
+
+def page_image(pages: int, dpi: int):
+    """GET /api/pdfs/<id>/page/1 (served from the page cache after warmup)"""
+    client = create_benchmark_app().test_client()
+    pdf_id = _seed_pdf(client, pages, 0)
+
+    def operation():
+        _check(client.get(f'/api/pdfs/{pdf_id}/page/1?dpi={dpi}'))
+    return operation
+
+
+def anchor_preview(pages: int, anchors: int):
+    """GET /api/pdfs/<id>/preview/1 (anchor overlay on the cached page)"""
+    client = create_benchmark_app().test_client()
+    pdf_id = _seed_pdf(client, pages, anchors)
+
+    def operation():
+        _check(client.get(f'/api/pdfs/{pdf_id}/preview/1'))
+    return operation
+
+
+def list_providers(providers: int, pdfs: int):
+    """GET /api/providers with every provider's PDFs and anchors"""
+    client = create_benchmark_app().test_client()
+    pdf_bytes = make_pdf(1)
+    for index in range(providers):
+        provider = _check(client.post('/api/providers', json={'name': f'Provider {index}'}), 201).get_json()
+        for number in range(pdfs):
+            # Distinct bytes per upload (duplicates within a provider are rejected)
+            data = pdf_bytes + f'\n% {index}-{number}\n'.encode()
+            pdf = _check(client.post(
+                f'/api/providers/{provider["id"]}/pdfs',
+                data={'pdf': (io.BytesIO(data), f'contract-{number}.pdf')},
+                content_type='multipart/form-data'
+            ), 201).get_json()
+            for anchor in make_anchors(5):
+                _check(client.post(f'/api/pdfs/{pdf["id"]}/anchors', json=anchor), 201)
+
+    def operation():
+        _check(client.get('/api/providers'))
+    return operation
+
+
+def cases(quick: bool = False) -> list:
+    """API case matrix (quick: small documents only)"""
+    page_counts = [1, 10] if quick else [1, 10, 100]
+    result = []
+
+    for pages in page_counts:
+        result.append(Case('api_autofill', 'api', autofill, {'pages': pages, 'anchors': 10}))
+        result.append(Case('api_autofill_saved', 'api', autofill_saved, {'pages': pages, 'anchors': 10}))
+
+    for dpi in (72, 150):
+        result.append(Case('api_page_image', 'api', page_image, {'pages': 10, 'dpi': dpi}))
+
+    result.append(Case('api_anchor_preview', 'api', anchor_preview, {'pages': 10, 'anchors': 20}))
+
+    for providers in ([5] if quick else [5, 50]):
+        result.append(Case('api_list_providers', 'api', list_providers, {'providers': providers, 'pdfs': 2}))
+
+    return result
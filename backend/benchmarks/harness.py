@@ -0,0 +1,197 @@
+"""
+Benchmark Harness - Timing, percentiles, peak memory and result files
+"""
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+
+RESULTS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+@dataclass
+class Case:
+    """
+    One benchmark: setup(**params) prepares inputs and returns the
+    zero-argument operation that is timed.
+    """
+    name: str
+    group: str  # 'service' or 'api'
+    setup: callable
+    params: dict = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        """Stable identifier used to match cases across result files"""
+        args = ','.join(f'{k}={v}' for k, v in sorted(self.params.items()))
+        return f'{self.name}[{args}]' if args else self.name
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def measure(operation, min_time: float = 1.0, min_iterations: int = 5,
+            max_iterations: int = 1000, warmup: int = 1) -> dict:
+    """
+    Time an operation repeatedly.
+
+    Runs warmup calls first (caches, lazy imports), then at least
+    min_iterations calls and until min_time seconds have passed.
+
+    Returns:
+        Dictionary of iteration count, throughput and latency stats (ms)
+    """
+    for _ in range(warmup):
+        operation()
+
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_iterations:
+        begin = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - begin)
+        if len(timings) >= min_iterations and time.perf_counter() - started >= min_time:
+            break
+    total = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        'iterations': len(timings),
+        'totalSeconds': round(total, 4),
+        'throughputPerSecond': round(len(timings) / total, 3),
+        'meanMs': round(sum(timings) / len(timings) * 1000, 3),
+        'minMs': round(timings[0] * 1000, 3),
+        'p50Ms': round(percentile(timings, 0.50) * 1000, 3),
+        'p99Ms': round(percentile(timings, 0.99) * 1000, 3),
+        'maxMs': round(timings[-1] * 1000, 3)
+    }
+
+
+def run_case(case: Case, min_time: float) -> dict:
+    """Set up and measure one case in the current process"""
+    baseline = peak_rss_mb()
+    operation = case.setup(**case.params)
+    stats = measure(operation, min_time=min_time)
+    peak = peak_rss_mb()
+    return {
+        'key': case.key,
+        'name': case.name,
+        'group': case.group,
+        'params': case.params,
+        **stats,
+        'peakRssMb': round(peak, 1),
+        'rssGrowthMb': round(peak - baseline, 1)
+    }
+
+
+def _child(case: Case, min_time: float, queue):
+    """Process entry point for an isolated case"""
+    try:
+        queue.put(run_case(case, min_time))
+    except Exception as e:
+        queue.put({'key': case.key, 'name': case.name, 'group': case.group,
+                   'params': case.params, 'error': f'{type(e).__name__}: {e}'})
+
+
+def run_isolated(case: Case, min_time: float) -> dict:
+    """
+    Measure one case in a fresh spawned process, so peak RSS and warm
+    caches are not carried over from earlier cases.
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(case, min_time, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def environment() -> dict:
+    """Metadata recorded with every run so results can be compared fairly"""
+    import fitz  # PyMuPDF
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, cwd=os.path.dirname(RESULTS_FOLDER)
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'gitCommit': commit,
+        'python': platform.python_version(),
+        'pymupdf': fitz.VersionBind,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpuCount': os.cpu_count()
+    }
+
+
+def write_results(results: list, path: str = None, settings: dict = None) -> str:
+    """
+    Write a run to a JSON file (default: benchmarks/results/<timestamp>.json).
+
+    Returns:
+        Path of the written file
+    """
+    if path is None:
+        os.makedirs(RESULTS_FOLDER, exist_ok=True)
+        path = os.path.join(RESULTS_FOLDER, time.strftime('%Y%m%d-%H%M%S') + '.json')
+
+    with open(path, 'w') as f:
+        json.dump({
+            'environment': environment(),
+            'settings': settings or {},
+            'results': results
+        }, f, indent=2)
+    return path
+
+
+def load_results(path: str) -> dict:
+    """Results of a run keyed by case key"""
+    with open(path) as f:
+        run = json.load(f)
+    return {result['key']: result for result in run['results']}
+
+
+def compare(base_path: str, new_path: str, threshold: float = 0.10) -> list:
+    """
+    Compare two result files case by case.
+
+    Args:
+        base_path: Baseline results JSON
+        new_path: New results JSON
+        threshold: Relative p50 increase treated as a regression (0.10 = 10%)
+
+    Returns:
+        List of (key, base p50, new p50, ratio, regressed) for cases in both runs
+    """
+    base = load_results(base_path)
+    new = load_results(new_path)
+
+    rows = []
+    for key, result in new.items():
+        before = base.get(key)
+        if not before or 'error' in before or 'error' in result:
+            continue
+        ratio = result['p50Ms'] / before['p50Ms'] if before['p50Ms'] else 1.0
+        rows.append((key, before['p50Ms'], result['p50Ms'], ratio, ratio > 1 + threshold))
+    return rows
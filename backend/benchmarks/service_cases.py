@@ -0,0 +1,88 @@
+"""
+Service Cases - PDF service functions called directly (no Flask)
+"""
+from benchmarks.harness import Case
+from benchmarks.synthetic import CANVAS_WIDTH, CANVAS_HEIGHT, PAGE_SETTINGS, make_pdf, make_anchors, make_values
+
+
+def place_anchors(pages: int, anchors: int, page_setting: str, values: bool = False,
+                  incremental: bool = False):
+    """Fill one document (warm placement plan cache, as on repeat requests)"""
+    from services.pdf_service import place_anchors_on_pdf
+
+    pdf_bytes = make_pdf(pages)
+    anchor_list = make_anchors(anchors, page_setting)
+    record = make_values(anchors) if values else None
+    save_options = {'incremental': True} if incremental else None
+
+    def operation():
+        place_anchors_on_pdf(pdf_bytes, anchor_list, CANVAS_WIDTH, CANVAS_HEIGHT,
+                             save_options=save_options, values=record)
+    return operation
+
+
+def fill_records(pages: int, anchors: int, records: int):
+    """Fill one template for many value records (one worker's chunk)"""
+    from services.pdf_service import fill_records as fill
+
+    pdf_bytes = make_pdf(pages)
+    anchor_list = make_anchors(anchors)
+    record_list = [make_values(anchors, record) for record in range(records)]
+
+    def operation():
+        for _ in fill(pdf_bytes, anchor_list, CANVAS_WIDTH, CANVAS_HEIGHT, record_list):
+            pass
+    return operation
+
+
+def render_page(pages: int, dpi: int):
+    """Render the first page of a document to PNG"""
+    from services.pdf_service import render_page_as_image
+
+    pdf_bytes = make_pdf(pages)
+
+    def operation():
+        render_page_as_image(pdf_bytes, 1, dpi)
+    return operation
+
+
+def text_hash(pages: int):
+    """Hash the extracted text of every page"""
+    from services.pdf_service import get_pdf_text_hash
+
+    pdf_bytes = make_pdf(pages)
+
+    def operation():
+        get_pdf_text_hash(pdf_bytes)
+    return operation
+
+
+def cases(quick: bool = False) -> list:
+    """Service case matrix (quick: small documents only)"""
+    page_counts = [1, 10] if quick else [1, 10, 100, 1000]
+    result = []
+
+    for pages in page_counts:
+        for page_setting in PAGE_SETTINGS:
+            result.append(Case('place_anchors', 'service', place_anchors,
+                               {'pages': pages, 'anchors': 10, 'page_setting': page_setting}))
+
+    for anchors in ([1, 50] if quick else [1, 10, 50, 200]):
+        result.append(Case('place_anchors', 'service', place_anchors,
+                           {'pages': 10, 'anchors': anchors, 'page_setting': 'global', 'values': True}))
+
+    for pages in ([10] if quick else [10, 100, 1000]):
+        result.append(Case('place_anchors', 'service', place_anchors,
+                           {'pages': pages, 'anchors': 10, 'page_setting': 'last', 'incremental': True}))
+
+    result.append(Case('fill_records', 'service', fill_records,
+                       {'pages': 10, 'anchors': 10, 'records': 10 if quick else 50}))
+
+    for pages in ([1] if quick else [1, 100]):
+        for dpi in (72, 150):
+            result.append(Case('render_page', 'service', render_page, {'pages': pages, 'dpi': dpi}))
+
+    for pages in page_counts:
+        result.append(Case('text_hash', 'service', text_hash, {'pages': pages}))
+
+    return result
@@ -0,0 +1,70 @@
+"""
+Synthetic Inputs - Generated PDFs and anchor sets of controlled size
+"""
+import fitz  # PyMuPDF
+
+# Canvas the anchors are placed on (editor defaults)
+CANVAS_WIDTH = 1224
+CANVAS_HEIGHT = 1584
+
+# Named anchor page settings used across cases
+PAGE_SETTINGS = {
+    'global': 'global',
+    'last': 'last',
+    'list': '1,2,3'
+}
+
+
+def make_pdf(pages: int, lines_per_page: int = 30) -> bytes:
+    """
+    Build a Letter-size PDF with distinct text on every page.
+
+    Args:
+        pages: Number of pages
+        lines_per_page: Lines of text per page (drives text extraction cost)
+
+    Returns:
+        PDF as bytes
+    """
+    doc = fitz.open()
+    for page_num in range(1, pages + 1):
+        page = doc.new_page(width=612, height=792)
+        lines = [
+            f'Page {page_num} line {line}: energy supply agreement terms and conditions'
+            for line in range(1, lines_per_page + 1)
+        ]
+        # One call per page keeps generation of 1,000-page files fast
+        page.insert_text((54, 54), lines, fontsize=9)
+    data = doc.tobytes(garbage=3, deflate=True)
+    doc.close()
+    return data
+
+
+def make_anchors(count: int, page_setting: str = 'global') -> list:
+    """
+    Build anchors spread over a grid on the canvas.
+
+    Args:
+        count: Number of anchors
+        page_setting: Key of PAGE_SETTINGS, or a raw page setting
+
+    Returns:
+        List of anchor dictionaries (as sent to /api/autofill)
+    """
+    page = PAGE_SETTINGS.get(page_setting, page_setting)
+    return [
+        {
+            'text': f'{{{{field_{index}}}}}',
+            'x': 100 + (index % 4) * 250,
+            'y': 150 + (index // 4) * 40 % (CANVAS_HEIGHT - 300),
+            'page': page,
+            'canvasWidth': CANVAS_WIDTH,
+            'canvasHeight': CANVAS_HEIGHT
+        }
+        for index in range(count)
+    ]
+
+
+def make_values(count: int, record: int = 0) -> dict:
+    """Values for anchors from make_anchors (one record)"""
+    return {f'field_{index}': f'Customer {record} value {index}' for index in range(count)}
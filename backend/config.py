@@ -6,13 +6,136 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def save_options(name: str) -> dict:
+    """
+    Parse output PDF save options from an env var.
+    
+    Format: comma-separated flags, e.g. "incremental" or "garbage=3,deflate"
+        - incremental: Append changes to the original bytes (fastest)
+        - garbage=0-4: Remove unused objects (higher = smaller, slower)
+        - deflate: Compress uncompressed streams
+    """
+    options = {'incremental': False, 'garbage': 0, 'deflate': False}
+    for flag in filter(None, (part.strip() for part in os.getenv(name, '').split(','))):
+        key, _, value = flag.partition('=')
+        if key == 'garbage' and value.isdigit() and 0 <= int(value) <= 4:
+            options['garbage'] = int(value)
+        elif key in ('incremental', 'deflate') and not value:
+            options[key] = True
+        else:
+            raise ValueError(f'{name}: invalid save option "{flag}"')
+    if options['incremental'] and options['garbage']:
+        raise ValueError(f'{name}: garbage collection cannot be combined with incremental saves')
+    return options
+
+
+def engine_options(url: str) -> dict:
+    """
+    SQLAlchemy engine options for a database URL, from DB_* env vars.
+    
+    Connections are checked before use (DB_POOL_PRE_PING) and replaced after
+    DB_POOL_RECYCLE seconds, so connections the server closed while idle
+    (MySQL wait_timeout, proxies) are reopened instead of failing a request.
+    Pool sizing applies to server databases only (SQLite keeps the default pool).
+    DB_STATEMENT_TIMEOUT_MS (0 = none) is set per connection on MySQL
+    (max_execution_time, SELECTs only) and PostgreSQL (statement_timeout).
+    """
+    options = {
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800))
+    }
+    if not url or url.startswith('sqlite'):
+        return options
+    
+    options['pool_size'] = int(os.getenv('DB_POOL_SIZE', 10))
+    options['max_overflow'] = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    options['pool_timeout'] = int(os.getenv('DB_POOL_TIMEOUT', 30))  # Seconds to wait for a free connection
+    
+    timeout_ms = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+    if timeout_ms and url.startswith('mysql'):
+        options['connect_args'] = {'init_command': f'SET SESSION max_execution_time={timeout_ms}'}
+    elif timeout_ms and url.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={timeout_ms}'}
+    return options
+
 class Config:
     """Base configuration"""
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    
+    # Read replica for read-only listing endpoints (unset: everything uses DATABASE_URL)
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+    SQLALCHEMY_BINDS = {
+        'replica': {'url': DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL)}
+    } if DATABASE_REPLICA_URL else {}
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB max file size
+    
+    # Create missing tables when the app is loaded (else run: flask --app app init-db)
+    DB_AUTO_CREATE = os.getenv('DB_AUTO_CREATE', 'true').lower() == 'true'
+    
+    # Content-addressed PDF storage ('local' or 's3'; s3 also caches under BLOB_FOLDER)
+    # Unset folders below are derived from UPLOAD_FOLDER when the app is created
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'local')
+    BLOB_FOLDER = os.getenv('BLOB_FOLDER')  # Default: UPLOAD_FOLDER/blobs
+    S3_BUCKET = os.getenv('S3_BUCKET')
+    S3_PREFIX = os.getenv('S3_PREFIX', 'pdfs/')
+    S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL')  # e.g. http://127.0.0.1:9000 for MinIO
+    
+    # Batch auto-fill (process pool size; defaults to CPU count)
+    AUTOFILL_WORKERS = int(os.getenv('AUTOFILL_WORKERS', 0)) or None
+    AUTOFILL_BATCH_MAX_FILES = int(os.getenv('AUTOFILL_BATCH_MAX_FILES', 500))
+    AUTOFILL_BATCH_MAX_ZIP_BYTES = int(os.getenv('AUTOFILL_BATCH_MAX_ZIP_BYTES', 512 * 1024 * 1024))  # Uncompressed
+    AUTOFILL_MAX_RECORDS = int(os.getenv('AUTOFILL_MAX_RECORDS', 10000))  # Value records per request
+    
+    # Output PDF save options per endpoint (see save_options above)
+    AUTOFILL_SAVE_OPTIONS = save_options('AUTOFILL_SAVE_OPTIONS')  # /autofill, /autofill/pdf/<id>
+    AUTOFILL_BATCH_SAVE_OPTIONS = save_options('AUTOFILL_BATCH_SAVE_OPTIONS')  # /autofill/pdf/<id>/batch
+    JOB_SAVE_OPTIONS = save_options('JOB_SAVE_OPTIONS')  # /jobs/autofill*
+    
+    # Background jobs (inputs/results spooled under UPLOAD_FOLDER/jobs)
+    JOB_FOLDER = os.getenv('JOB_FOLDER')  # Default: UPLOAD_FOLDER/jobs
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))  # Concurrent jobs per worker process
+    JOB_QUEUE_MAX = int(os.getenv('JOB_QUEUE_MAX', 100))  # Reject submissions beyond this many pending jobs
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1.0))  # Seconds between queue polls
+    JOB_RUNNING_TIMEOUT = int(os.getenv('JOB_RUNNING_TIMEOUT', 3600))  # Fail jobs running longer (dead worker)
+    JOB_RETENTION = int(os.getenv('JOB_RETENTION', 24 * 3600))  # Seconds finished jobs and results are kept
+    
+    # Rendered page image cache (memory tier + disk tier under UPLOAD_FOLDER/cache)
+    PAGE_CACHE_FOLDER = os.getenv('PAGE_CACHE_FOLDER')  # Default: UPLOAD_FOLDER/cache/pages
+    PAGE_CACHE_MAX_BYTES = int(os.getenv('PAGE_CACHE_MAX_BYTES', 64 * 1024 * 1024))  # 64MB in memory
+    PAGE_CACHE_MAX_AGE = int(os.getenv('PAGE_CACHE_MAX_AGE', 3600))  # Browser Cache-Control max-age (seconds)
+    
+    # Filled PDF cache for repeated identical /autofill requests (memory + disk under UPLOAD_FOLDER/cache)
+    FILL_CACHE_ENABLED = os.getenv('FILL_CACHE_ENABLED', 'true').lower() == 'true'
+    FILL_CACHE_FOLDER = os.getenv('FILL_CACHE_FOLDER')  # Default: UPLOAD_FOLDER/cache/fills
+    FILL_CACHE_MAX_BYTES = int(os.getenv('FILL_CACHE_MAX_BYTES', 64 * 1024 * 1024))  # 64MB in memory
+    FILL_CACHE_DISK_MAX_BYTES = int(os.getenv('FILL_CACHE_DISK_MAX_BYTES', 512 * 1024 * 1024))  # 512MB on disk
+    
+    # Page rendering (GET /pdfs/<id>/page/<n>?dpi=&width=&format=)
+    PAGE_DEFAULT_DPI = 150  # Editor resolution
+    PAGE_MAX_DPI = 600
+    PAGE_MAX_WIDTH = 4000  # Pixels
+    PAGE_THUMBNAIL_WIDTH = 200  # Pixels
+    PAGE_PRERENDER = os.getenv('PAGE_PRERENDER', 'true').lower() == 'true'  # Render thumbnails + editor pages on upload
+    PAGE_PRERENDER_WORKERS = int(os.getenv('PAGE_PRERENDER_WORKERS', 1))  # Own process pool (never the batch pool)
+    PAGE_PRERENDER_QUEUE_MAX = int(os.getenv('PAGE_PRERENDER_QUEUE_MAX', 8))  # Pending renders; more are skipped
+    
+    # Open template documents kept per worker process
+    DOC_POOL_MAX_DOCS = int(os.getenv('DOC_POOL_MAX_DOCS', 16))
+    DOC_POOL_MAX_BYTES = int(os.getenv('DOC_POOL_MAX_BYTES', 256 * 1024 * 1024))  # Sum of file sizes
+    
+    # ASGI serving (uvicorn asgi:application): request threads per process; client I/O stays on the event loop
+    ASGI_THREADS = int(os.getenv('ASGI_THREADS', 8))
+    ASGI_BODY_MEMORY_BYTES = int(os.getenv('ASGI_BODY_MEMORY_BYTES', 1024 * 1024))  # Larger bodies spool to disk
+    ASGI_RESPONSE_CHUNK_BYTES = 64 * 1024  # Response bytes produced per thread hop
+    
+    # Request instrumentation (Prometheus metrics at /api/metrics, per-process)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    SERVER_TIMING = os.getenv('SERVER_TIMING', 'true').lower() == 'true'  # Server-Timing header with stage durations
 
 class DevelopmentConfig(Config):
     """Development configuration"""
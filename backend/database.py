@@ -1,6 +1,54 @@
 """
 Database setup with SQLAlchemy
+Read-only endpoints marked with @read_replica query the 'replica' bind
+(DATABASE_REPLICA_URL) when one is configured; everything else, and any
+query after a write in the same session, uses the primary (DATABASE_URL).
 """
+import functools
+
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs of @read_replica requests to the replica engine"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause) -> bool:
+        if not has_request_context() or not g.get('read_replica'):
+            return False
+
+        if self._flushing or not getattr(clause, 'is_select', False):
+            # Writes stick to the primary so later reads see them
+            self.info['wrote'] = True
+            return False
+
+        return not self.info.get('wrote')
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def read_replica(view):
+    """Route decorator: serve this read-only endpoint from the replica, if configured"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
 
-db = SQLAlchemy()
+def init_schema(app):
+    """Create missing tables (existing tables are never altered; see MIGRATION_GUIDE.md)"""
+    with app.app_context():
+        db.create_all(bind_key=None)  # The replica receives schema changes from the primary
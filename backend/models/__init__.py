@@ -4,5 +4,8 @@ Models package - exports all database models
 from .provider import Provider
 from .anchor import Anchor
 from .pdf import ProviderPDF
+from .job import Job
+from .fingerprint import PageFingerprint
+from .page_geometry import PageGeometry
 
-__all__ = ['Provider', 'Anchor', 'ProviderPDF']
+__all__ = ['Provider', 'Anchor', 'ProviderPDF', 'Job', 'PageFingerprint', 'PageGeometry']
@@ -9,13 +9,18 @@ class Anchor(db.Model):
     __tablename__ = 'anchor_settings'
     
     id = db.Column(db.Integer, primary_key=True)
-    pdf_id = db.Column(db.Integer, db.ForeignKey('provider_pdfs.id'), nullable=False)  # Changed from provider_id
+    pdf_id = db.Column(db.Integer, db.ForeignKey('provider_pdfs.id'), nullable=False, index=True)  # Changed from provider_id
     text = db.Column(db.String(255), nullable=False)  # e.g., "{{signature}}"
     x = db.Column(db.Integer, nullable=False)  # X coordinate
     y = db.Column(db.Integer, nullable=False)  # Y coordinate
     page = db.Column(db.String(50), default='1')  # "1", "1,2,3", "last", "global"
     canvas_width = db.Column(db.Integer)  # Canvas width when anchor was placed
     canvas_height = db.Column(db.Integer)  # Canvas height when anchor was placed
+    font = db.Column(db.String(30), default='helvetica')  # Base-14 font, e.g. "times-bold"
+    font_size = db.Column(db.Float, default=10)  # Points
+    align = db.Column(db.String(10), default='left')  # "left", "center", "right"
+    max_width = db.Column(db.Integer)  # Canvas units; wraps (or shrinks) longer text
+    auto_shrink = db.Column(db.Boolean, default=False)  # Shrink to fit max_width instead of wrapping
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -29,7 +34,12 @@ class Anchor(db.Model):
             'y': self.y,
             'page': self.page,
             'canvasWidth': self.canvas_width,
-            'canvasHeight': self.canvas_height
+            'canvasHeight': self.canvas_height,
+            'font': self.font,
+            'fontSize': self.font_size,
+            'align': self.align,
+            'maxWidth': self.max_width,
+            'autoShrink': self.auto_shrink
         }
     
     def __repr__(self):
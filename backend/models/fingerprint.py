@@ -0,0 +1,91 @@
+"""
+PageFingerprint Model - Per-page text hashes for duplicate detection
+Rows are keyed by content hash (like stored blobs), so a file uploaded for
+several providers is fingerprinted once. A re-exported contract has new
+bytes but the same page text, so its pages match by text_hash.
+"""
+from database import db
+
+# Hashes per IN (...) clause when matching many pages
+MATCH_CHUNK_SIZE = 500
+
+
+class PageFingerprint(db.Model):
+    __tablename__ = 'page_fingerprints'
+    __table_args__ = (
+        db.UniqueConstraint('content_hash', 'page_num', name='uq_page_fingerprints_content_page'),
+        db.Index('ix_page_fingerprints_text_content', 'text_hash', 'content_hash'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False)  # File the page belongs to
+    page_num = db.Column(db.Integer, nullable=False)  # 1-indexed
+    text_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of whitespace-normalized page text
+
+    @staticmethod
+    def exists_for(content_hash: str) -> bool:
+        """True if a file's pages are already indexed"""
+        return db.session.query(
+            PageFingerprint.query.filter_by(content_hash=content_hash).exists()
+        ).scalar()
+
+    @staticmethod
+    def store(content_hash: str, page_hashes: list):
+        """
+        Index a file's pages (one executemany INSERT). Caller commits.
+
+        Args:
+            content_hash: Content hash of the file
+            page_hashes: List of (page_num, text_hash); pages without text are omitted
+        """
+        if not page_hashes:
+            return
+        db.session.execute(db.insert(PageFingerprint), [
+            {'content_hash': content_hash, 'page_num': page_num, 'text_hash': text_hash}
+            for page_num, text_hash in page_hashes
+        ])
+
+    @staticmethod
+    def page_hashes(content_hash: str) -> list:
+        """Stored (page_num, text_hash) pairs of a file, in page order"""
+        return db.session.query(PageFingerprint.page_num, PageFingerprint.text_hash).filter_by(
+            content_hash=content_hash
+        ).order_by(PageFingerprint.page_num).all()
+
+    @staticmethod
+    def match_counts(text_hashes: set) -> dict:
+        """
+        Map content hash -> number of the given page text hashes it contains,
+        using the (text_hash, content_hash) index rather than scanning files.
+        """
+        counts = {}
+        text_hashes = list(text_hashes)
+        for start in range(0, len(text_hashes), MATCH_CHUNK_SIZE):
+            chunk = text_hashes[start:start + MATCH_CHUNK_SIZE]
+            rows = db.session.query(
+                PageFingerprint.content_hash,
+                db.func.count(db.distinct(PageFingerprint.text_hash))
+            ).filter(PageFingerprint.text_hash.in_(chunk)).group_by(PageFingerprint.content_hash).all()
+            # Chunks are disjoint, so per-chunk distinct counts add up
+            for content_hash, count in rows:
+                counts[content_hash] = counts.get(content_hash, 0) + count
+        return counts
+
+    @staticmethod
+    def distinct_page_counts(content_hashes: list) -> dict:
+        """Map content hash -> number of distinct page texts, in one GROUP BY query"""
+        if not content_hashes:
+            return {}
+        rows = db.session.query(
+            PageFingerprint.content_hash,
+            db.func.count(db.distinct(PageFingerprint.text_hash))
+        ).filter(PageFingerprint.content_hash.in_(content_hashes)).group_by(PageFingerprint.content_hash).all()
+        return dict(rows)
+
+    @staticmethod
+    def remove(content_hash: str):
+        """Drop a file's fingerprints (when its last record is deleted). Caller commits."""
+        PageFingerprint.query.filter_by(content_hash=content_hash).delete(synchronize_session=False)
+
+    def __repr__(self):
+        return f'<PageFingerprint {self.content_hash[:12]} p{self.page_num}>'
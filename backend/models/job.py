@@ -0,0 +1,47 @@
+"""
+Job Model - Background auto-fill jobs
+Jobs live in the main database so any worker process can claim them
+"""
+from database import db
+from datetime import datetime
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    
+    # Job statuses
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    
+    id = db.Column(db.String(32), primary_key=True)  # UUID hex
+    kind = db.Column(db.String(50), nullable=False, default='autofill')
+    status = db.Column(db.String(20), nullable=False, default=QUEUED, index=True)
+    progress = db.Column(db.Integer, default=0)  # 0-100
+    pdf_id = db.Column(db.Integer, nullable=True)  # Template used, if any (no FK: jobs outlive hard-deleted PDFs)
+    params = db.Column(db.Text)  # JSON: anchors, canvas dimensions, preview flag
+    input_path = db.Column(db.String(500))
+    result_path = db.Column(db.String(500))
+    result_filename = db.Column(db.String(255))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        """Convert job to dictionary for JSON response"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'pdfId': self.pdf_id,
+            'error': self.error,
+            'resultFilename': self.result_filename,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.status}>'
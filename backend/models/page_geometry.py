@@ -0,0 +1,91 @@
+"""
+PageGeometry Model - Per-page size, rotation and boxes of stored PDFs
+Rows are keyed by content hash (like fingerprints), so a file is measured
+once at upload however many providers use it. Coordinate conversion and
+previews read the geometry from here instead of loading every page.
+"""
+from database import db
+
+
+class PageGeometry(db.Model):
+    __tablename__ = 'page_geometry'
+    __table_args__ = (
+        db.UniqueConstraint('content_hash', 'page_num', name='uq_page_geometry_content_page'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False)  # File the page belongs to
+    page_num = db.Column(db.Integer, nullable=False)  # 1-indexed
+    width = db.Column(db.Float, nullable=False)  # Displayed width in points (CropBox after /Rotate)
+    height = db.Column(db.Float, nullable=False)  # Displayed height in points
+    rotation = db.Column(db.SmallInteger, nullable=False, default=0)  # /Rotate: 0, 90, 180 or 270
+
+    # Boxes in points, top-left origin (PyMuPDF convention, like anchor coordinates)
+    crop_x0 = db.Column(db.Float, nullable=False)
+    crop_y0 = db.Column(db.Float, nullable=False)
+    crop_x1 = db.Column(db.Float, nullable=False)
+    crop_y1 = db.Column(db.Float, nullable=False)
+    media_x0 = db.Column(db.Float, nullable=False)
+    media_y0 = db.Column(db.Float, nullable=False)
+    media_x1 = db.Column(db.Float, nullable=False)
+    media_y1 = db.Column(db.Float, nullable=False)
+
+    @staticmethod
+    def exists_for(content_hash: str) -> bool:
+        """True if a file's pages are already measured"""
+        return db.session.query(
+            PageGeometry.query.filter_by(content_hash=content_hash).exists()
+        ).scalar()
+
+    @staticmethod
+    def store(content_hash: str, pages: list):
+        """
+        Save a file's page geometry (one executemany INSERT). Caller commits.
+
+        Args:
+            content_hash: Content hash of the file
+            pages: List of (page_num, width, height, rotation, cropbox, mediabox),
+                   boxes as (x0, y0, x1, y1)
+        """
+        if not pages:
+            return
+        db.session.execute(db.insert(PageGeometry), [
+            {
+                'content_hash': content_hash, 'page_num': page_num,
+                'width': width, 'height': height, 'rotation': rotation,
+                'crop_x0': cropbox[0], 'crop_y0': cropbox[1], 'crop_x1': cropbox[2], 'crop_y1': cropbox[3],
+                'media_x0': mediabox[0], 'media_y0': mediabox[1], 'media_x1': mediabox[2], 'media_y1': mediabox[3]
+            }
+            for page_num, width, height, rotation, cropbox, mediabox in pages
+        ])
+
+    @staticmethod
+    def for_file(content_hash: str) -> list:
+        """Stored rows of a file, in page order"""
+        return PageGeometry.query.filter_by(content_hash=content_hash).order_by(PageGeometry.page_num).all()
+
+    @staticmethod
+    def plan_geometry(content_hash: str) -> tuple:
+        """Tuple of (width, height, rotation) per page, as used by placement plans (empty if not stored)"""
+        rows = db.session.query(PageGeometry.width, PageGeometry.height, PageGeometry.rotation).filter_by(
+            content_hash=content_hash
+        ).order_by(PageGeometry.page_num).all()
+        return tuple((width, height, rotation) for width, height, rotation in rows)
+
+    @staticmethod
+    def remove(content_hash: str):
+        """Drop a file's geometry (when its last record is deleted). Caller commits."""
+        PageGeometry.query.filter_by(content_hash=content_hash).delete(synchronize_session=False)
+
+    def to_dict(self):
+        return {
+            'pageNum': self.page_num,
+            'width': self.width,
+            'height': self.height,
+            'rotation': self.rotation,
+            'cropBox': [self.crop_x0, self.crop_y0, self.crop_x1, self.crop_y1],
+            'mediaBox': [self.media_x0, self.media_y0, self.media_x1, self.media_y1]
+        }
+
+    def __repr__(self):
+        return f'<PageGeometry {self.content_hash[:12]} p{self.page_num}>'
@@ -7,6 +7,13 @@ from datetime import datetime
 
 class ProviderPDF(db.Model):
     __tablename__ = 'provider_pdfs'
+    __table_args__ = (
+        db.Index('ix_provider_pdfs_provider_active', 'provider_id', 'is_active'),
+        # One active copy of a file per provider. Inactive rows have a NULL
+        # active_key, which never collides, so soft-deleted copies may pile up.
+        db.UniqueConstraint('provider_id', 'content_hash', 'active_key',
+                            name='uq_provider_pdfs_provider_hash_active'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     provider_id = db.Column(db.Integer, db.ForeignKey('providers.id'), nullable=False)
@@ -16,15 +23,26 @@ class ProviderPDF(db.Model):
     total_pages = db.Column(db.Integer)  # Number of pages
     canvas_width = db.Column(db.Integer)  # Canvas width for coordinate conversion
     canvas_height = db.Column(db.Integer)  # Canvas height for coordinate conversion
-    content_hash = db.Column(db.String(64))  # SHA-256 hash for duplicate detection
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 hash for duplicate detection
+    text_hash = db.Column(db.String(64), index=True)  # Text fingerprint (same text, different bytes); None if no text
     is_active = db.Column(db.Boolean, default=True)  # Soft delete support
+    active_key = db.Column(  # 1 when active, NULL when not (maintained by the database)
+        db.SmallInteger, db.Computed('CASE WHEN is_active THEN 1 ELSE NULL END', persisted=True)
+    )
+    anchor_revision = db.Column(db.Integer, nullable=False, default=0)  # Bumped on every anchor change
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationship: PDF has many Anchors
     anchors = db.relationship('Anchor', backref='pdf', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self, include_anchors=True):
-        """Convert PDF info to dictionary for JSON response"""
+    def to_dict(self, include_anchors=True, anchor_count=None):
+        """
+        Convert PDF info to dictionary for JSON response.
+        Pass anchor_count (from anchor_counts()) to avoid loading anchors just to count them.
+        """
+        if anchor_count is None:
+            anchor_count = len(self.anchors) if self.anchors else 0
+        
         data = {
             'id': self.id,
             'providerId': self.provider_id,
@@ -35,18 +53,48 @@ class ProviderPDF(db.Model):
             'canvasWidth': self.canvas_width,
             'canvasHeight': self.canvas_height,
             'contentHash': self.content_hash,
+            'textHash': self.text_hash,
             'isActive': self.is_active,
+            'anchorRevision': self.anchor_revision,
             'createdAt': self.created_at.isoformat() if self.created_at else None,
-            'anchorCount': len(self.anchors) if self.anchors else 0
+            'anchorCount': anchor_count
         }
         if include_anchors:
             data['anchors'] = [anchor.to_dict() for anchor in self.anchors]
         return data
     
+    @property
+    def plan_key(self) -> tuple:
+        """Cache identity of this PDF's current anchor set (see services.pdf_service)"""
+        return ('pdf', self.id, self.anchor_revision)
+    
+    def bump_anchor_revision(self):
+        """Mark anchors as changed (evaluated in SQL, so concurrent bumps don't collide)"""
+        self.anchor_revision = ProviderPDF.anchor_revision + 1
+    
+    @staticmethod
+    def anchor_counts(pdf_ids: list) -> dict:
+        """Map PDF id -> number of anchors, in one GROUP BY query"""
+        from .anchor import Anchor
+        if not pdf_ids:
+            return {}
+        rows = db.session.query(Anchor.pdf_id, db.func.count(Anchor.id)).filter(
+            Anchor.pdf_id.in_(pdf_ids)
+        ).group_by(Anchor.pdf_id).all()
+        return dict(rows)
+    
     @staticmethod
     def find_by_hash(content_hash: str):
         """Find PDF by content hash (for duplicate detection)"""
         return ProviderPDF.query.filter_by(content_hash=content_hash).first()
     
+    @staticmethod
+    def find_active_duplicate(provider_id: int, content_hash: str, exclude_id: int = None):
+        """Active PDF of a provider with the same content (uses the uniqueness index)"""
+        query = ProviderPDF.query.filter_by(provider_id=provider_id, content_hash=content_hash, is_active=True)
+        if exclude_id is not None:
+            query = query.filter(ProviderPDF.id != exclude_id)
+        return query.first()
+    
     def __repr__(self):
         return f'<ProviderPDF {self.filename}>'
@@ -4,12 +4,13 @@ Now supports multiple PDFs, each with its own anchors
 """
 from database import db
 from datetime import datetime
+from sqlalchemy.orm import selectinload
 
 class Provider(db.Model):
     __tablename__ = 'providers'
     
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(255), nullable=False)
+    name = db.Column(db.String(255), nullable=False, index=True)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -17,20 +18,38 @@ class Provider(db.Model):
     # Relationships: Provider has many PDFs (each PDF has many Anchors)
     pdfs = db.relationship('ProviderPDF', backref='provider', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self, include_pdfs=True):
-        """Convert provider to dictionary for JSON response"""
-        active_pdfs = [pdf for pdf in self.pdfs if pdf.is_active] if self.pdfs else []
+    def to_dict(self, include_pdfs=True, include_anchors=None, counts=None):
+        """
+        Convert provider to dictionary for JSON response.
+        
+        Args:
+            include_pdfs: Nest all PDFs (active and inactive) with their anchors
+            include_anchors: Add flattened anchors of active PDFs (defaults to include_pdfs)
+            counts: Optional (pdf_count, anchor_count) from aggregate_counts();
+                    when given, PDFs are not loaded just to count them
+        """
+        if include_anchors is None:
+            include_anchors = include_pdfs
         
         data = {
             'id': str(self.id),
             'name': self.name,
-            'active': self.is_active,
-            'pdfCount': len(active_pdfs)  # Count only active PDFs
+            'active': self.is_active
         }
         
+        if counts is not None and not include_pdfs and not include_anchors:
+            data['pdfCount'], data['anchorCount'] = counts
+            return data
+        
+        active_pdfs = [pdf for pdf in self.pdfs if pdf.is_active] if self.pdfs else []
+        data['pdfCount'] = len(active_pdfs)  # Count only active PDFs
+        data['anchorCount'] = sum(len(pdf.anchors) for pdf in active_pdfs)
+        
         if include_pdfs:
             # Include ALL PDFs (active and inactive) for management
             data['pdfs'] = [pdf.to_dict() for pdf in self.pdfs]
+        
+        if include_anchors:
             # Flatten anchors from ACTIVE PDFs only for backward compatibility
             all_anchors = []
             for pdf in active_pdfs:
@@ -39,5 +58,35 @@ class Provider(db.Model):
         
         return data
     
+    @staticmethod
+    def query_with_pdfs():
+        """Provider query that loads PDFs and their anchors in 3 statements total (no N+1)"""
+        from .pdf import ProviderPDF
+        return Provider.query.options(
+            selectinload(Provider.pdfs).selectinload(ProviderPDF.anchors)
+        )
+    
+    @staticmethod
+    def aggregate_counts(provider_ids: list) -> dict:
+        """
+        Map provider id -> (active PDF count, anchor count on active PDFs)
+        in a single GROUP BY query. Providers with no active PDFs are absent.
+        """
+        from .pdf import ProviderPDF
+        from .anchor import Anchor
+        if not provider_ids:
+            return {}
+        rows = db.session.query(
+            ProviderPDF.provider_id,
+            db.func.count(db.distinct(ProviderPDF.id)),
+            db.func.count(Anchor.id)
+        ).outerjoin(
+            Anchor, Anchor.pdf_id == ProviderPDF.id
+        ).filter(
+            ProviderPDF.provider_id.in_(provider_ids),
+            ProviderPDF.is_active.is_(True)
+        ).group_by(ProviderPDF.provider_id).all()
+        return {provider_id: (pdf_count, anchor_count) for provider_id, pdf_count, anchor_count in rows}
+    
     def __repr__(self):
         return f'<Provider {self.name}>'
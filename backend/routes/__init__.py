@@ -5,5 +5,7 @@ from .providers import providers_bp
 from .anchors import anchors_bp
 from .pdfs import pdfs_bp
 from .autofill import autofill_bp
+from .jobs import jobs_bp
+from .metrics import metrics_bp
 
-__all__ = ['providers_bp', 'anchors_bp', 'pdfs_bp', 'autofill_bp']
+__all__ = ['providers_bp', 'anchors_bp', 'pdfs_bp', 'autofill_bp', 'jobs_bp', 'metrics_bp']
@@ -3,15 +3,78 @@ Anchor Routes - CRUD operations for anchor settings
 Anchors now belong to PDFs (not directly to providers)
 """
 from flask import Blueprint, request, jsonify
-from database import db
+from datetime import datetime
+from sqlalchemy import insert, update, delete
+from database import db, read_replica
 from models import Provider, Anchor, ProviderPDF
+from services.pdf_service import invalidate_placement_plans, validate_page_setting
+from services.text_layout import anchor_style
 
 anchors_bp = Blueprint('anchors', __name__)
 
+# Request JSON keys -> Anchor columns (for updates)
+ANCHOR_FIELDS = {
+    'text': 'text',
+    'x': 'x',
+    'y': 'y',
+    'page': 'page',
+    'canvasWidth': 'canvas_width',
+    'canvasHeight': 'canvas_height',
+    'font': 'font',
+    'fontSize': 'font_size',
+    'align': 'align',
+    'maxWidth': 'max_width',
+    'autoShrink': 'auto_shrink'
+}
+
+STYLE_FIELDS = ('font', 'fontSize', 'align', 'maxWidth', 'autoShrink')
+
+# Fields stored in NOT NULL columns (may be omitted, but never null)
+REQUIRED_FIELDS = ('text', 'x', 'y')
+
+# Numeric position fields (canvas size may be null: the PDF's canvas is used)
+COORDINATE_FIELDS = ('x', 'y')
+CANVAS_FIELDS = ('canvasWidth', 'canvasHeight')
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def check_position(data: dict):
+    """
+    Validate the position fields present in request JSON (a numeric page
+    is converted to the stored string form in place).
+    
+    Raises:
+        ValueError: If x/y are not numbers, the canvas size is not a positive
+                    number, or page is not a valid page setting
+    """
+    for key in COORDINATE_FIELDS:
+        if key in data and not _is_number(data[key]):
+            raise ValueError(f'{key} must be a number')
+    for key in CANVAS_FIELDS:
+        if data.get(key) is not None and (not _is_number(data[key]) or data[key] <= 0):
+            raise ValueError(f'{key} must be a positive number')
+    if 'page' in data:
+        data['page'] = validate_page_setting(data['page'])
+
+
+def style_columns(data: dict) -> dict:
+    """
+    Validated text style settings from request JSON, as Anchor column values.
+    
+    Raises:
+        ValueError: If a setting is invalid
+    """
+    anchor_style(data)
+    return {ANCHOR_FIELDS[key]: data[key] for key in STYLE_FIELDS if key in data}
+
 
 # ============ ANCHORS BY PDF ============
 
 @anchors_bp.route('/pdfs/<int:pdf_id>/anchors', methods=['GET'])
+@read_replica
 def get_pdf_anchors(pdf_id):
     """Get all anchors for a specific PDF"""
     provider_pdf = ProviderPDF.query.get_or_404(pdf_id)
@@ -31,6 +94,11 @@ def create_anchor_for_pdf(pdf_id):
     if not data.get('text'):
         return jsonify({'error': 'Anchor text is required'}), 400
     
+    try:
+        style = style_columns(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     anchor = Anchor(
         pdf_id=provider_pdf.id,
         text=data['text'],
@@ -38,18 +106,160 @@ def create_anchor_for_pdf(pdf_id):
         y=data.get('y', 0),
         page=data.get('page', '1'),
         canvas_width=data.get('canvasWidth') or provider_pdf.canvas_width,
-        canvas_height=data.get('canvasHeight') or provider_pdf.canvas_height
+        canvas_height=data.get('canvasHeight') or provider_pdf.canvas_height,
+        **style
     )
     
     db.session.add(anchor)
+    provider_pdf.bump_anchor_revision()
     db.session.commit()
+    invalidate_placement_plans(provider_pdf.id)
     
     return jsonify(anchor.to_dict()), 201
 
 
+@anchors_bp.route('/pdfs/<int:pdf_id>/anchors', methods=['PATCH'])
+def bulk_update_pdf_anchors(pdf_id):
+    """
+    Apply a batch of anchor changes for a PDF in a single transaction.
+    
+    Expects JSON:
+        - creates: List of new anchors ({text, x, y, page, canvasWidth, canvasHeight,
+                   font, fontSize, align, maxWidth, autoShrink})
+        - updates: List of partial anchors, each with its id
+        - deletes: List of anchor ids
+        - revision: (optional) anchorRevision the client last saw; if the PDF's
+                    anchors changed since, nothing is applied and 409 is returned
+    
+    Returns:
+        - anchors: The PDF's full anchor set after the change
+        - revision: The new anchorRevision
+    """
+    provider_pdf = ProviderPDF.query.get_or_404(pdf_id)
+    data = request.get_json()
+    
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body is required'}), 400
+    
+    creates = data.get('creates') or []
+    updates = data.get('updates') or []
+    deletes = data.get('deletes') or []
+    expected_revision = data.get('revision')
+    
+    if not all(isinstance(items, list) for items in (creates, updates, deletes)):
+        return jsonify({'error': 'creates, updates and deletes must be lists'}), 400
+    
+    # Validate before touching the database
+    if any(not isinstance(a, dict) or not a.get('text') for a in creates):
+        return jsonify({'error': 'Anchor text is required for every created anchor'}), 400
+    if any(not isinstance(a, dict) or not isinstance(a.get('id'), int) for a in updates):
+        return jsonify({'error': 'Every update needs an anchor id'}), 400
+    if any(not isinstance(anchor_id, int) for anchor_id in deletes):
+        return jsonify({'error': 'deletes must be a list of anchor ids'}), 400
+    if any(a.get('text') == '' for a in updates):
+        return jsonify({'error': 'Anchor text cannot be empty'}), 400
+    if any(key in a and a[key] is None for a in creates + updates for key in REQUIRED_FIELDS):
+        return jsonify({'error': f'{", ".join(REQUIRED_FIELDS)} cannot be null'}), 400
+    if expected_revision is not None and (
+        not isinstance(expected_revision, int) or isinstance(expected_revision, bool)
+    ):
+        return jsonify({'error': 'revision must be an integer'}), 400
+    try:
+        for a in creates + updates:
+            check_position(a)
+            anchor_style(a)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Updates and deletes may only target this PDF's anchors
+    target_ids = {a['id'] for a in updates} | set(deletes)
+    if target_ids:
+        owned_ids = {row[0] for row in db.session.query(Anchor.id).filter(
+            Anchor.pdf_id == provider_pdf.id,
+            Anchor.id.in_(target_ids)
+        )}
+        missing = sorted(target_ids - owned_ids)
+        if missing:
+            return jsonify({'error': 'Anchors not found for this PDF', 'ids': missing}), 404
+    
+    # Bump the revision first: the conditional UPDATE is the optimistic
+    # concurrency check and also locks the PDF row for this transaction
+    revision_filter = [ProviderPDF.id == provider_pdf.id]
+    if expected_revision is not None:
+        revision_filter.append(ProviderPDF.anchor_revision == expected_revision)
+    bumped = db.session.execute(
+        update(ProviderPDF)
+        .where(*revision_filter)
+        .values(anchor_revision=ProviderPDF.anchor_revision + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    
+    if not bumped:
+        db.session.rollback()
+        db.session.refresh(provider_pdf)
+        return jsonify({
+            'error': 'Anchors were changed by someone else',
+            'revision': provider_pdf.anchor_revision
+        }), 409
+    
+    now = datetime.utcnow()
+    
+    if deletes:
+        db.session.execute(
+            delete(Anchor)
+            .where(Anchor.pdf_id == provider_pdf.id, Anchor.id.in_(deletes))
+            .execution_options(synchronize_session=False)
+        )
+    
+    if updates:
+        # ORM bulk UPDATE by primary key (executemany)
+        db.session.execute(update(Anchor), [
+            dict(
+                {'id': a['id'], 'updated_at': now},
+                **{column: a[key] for key, column in ANCHOR_FIELDS.items() if key in a}
+            )
+            for a in updates
+        ])
+    
+    if creates:
+        # Bulk INSERT (executemany)
+        db.session.execute(insert(Anchor), [
+            {
+                'pdf_id': provider_pdf.id,
+                'text': a['text'],
+                'x': a.get('x', 0),
+                'y': a.get('y', 0),
+                'page': a.get('page', '1'),
+                'canvas_width': a.get('canvasWidth') or provider_pdf.canvas_width,
+                'canvas_height': a.get('canvasHeight') or provider_pdf.canvas_height,
+                'font': a.get('font') or 'helvetica',
+                'font_size': a.get('fontSize') or 10,
+                'align': a.get('align') or 'left',
+                'max_width': a.get('maxWidth'),
+                'auto_shrink': bool(a.get('autoShrink')),
+                'created_at': now,
+                'updated_at': now
+            }
+            for a in creates
+        ])
+    
+    db.session.commit()
+    invalidate_placement_plans(provider_pdf.id)
+    
+    # Fresh read of the committed state
+    db.session.refresh(provider_pdf)
+    anchors = Anchor.query.filter_by(pdf_id=provider_pdf.id).order_by(Anchor.id).all()
+    
+    return jsonify({
+        'anchors': [a.to_dict() for a in anchors],
+        'revision': provider_pdf.anchor_revision
+    })
+
+
 # ============ SINGLE ANCHOR OPERATIONS ============
 
 @anchors_bp.route('/anchors/<int:anchor_id>', methods=['GET'])
+@read_replica
 def get_anchor(anchor_id):
     """Get single anchor by ID"""
     anchor = Anchor.query.get_or_404(anchor_id)
@@ -62,6 +272,11 @@ def update_anchor(anchor_id):
     anchor = Anchor.query.get_or_404(anchor_id)
     data = request.get_json()
     
+    try:
+        style = style_columns(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     if data.get('text'):
         anchor.text = data['text']
     if 'x' in data:
@@ -74,8 +289,12 @@ def update_anchor(anchor_id):
         anchor.canvas_width = data['canvasWidth']
     if 'canvasHeight' in data:
         anchor.canvas_height = data['canvasHeight']
+    for column, value in style.items():
+        setattr(anchor, column, value)
     
+    anchor.pdf.bump_anchor_revision()
     db.session.commit()
+    invalidate_placement_plans(anchor.pdf_id)
     
     return jsonify(anchor.to_dict())
 
@@ -85,8 +304,11 @@ def delete_anchor(anchor_id):
     """Delete anchor (hard delete)"""
     anchor = Anchor.query.get_or_404(anchor_id)
     
+    pdf_id = anchor.pdf_id
+    anchor.pdf.bump_anchor_revision()
     db.session.delete(anchor)
     db.session.commit()
+    invalidate_placement_plans(pdf_id)
     
     return jsonify({'message': 'Anchor deleted', 'id': anchor_id})
 
@@ -95,18 +317,24 @@ def delete_anchor(anchor_id):
 # These routes aggregate all anchors across all PDFs for a provider
 
 @anchors_bp.route('/providers/<int:provider_id>/anchors', methods=['GET'])
+@read_replica
 def get_provider_anchors(provider_id):
     """Get all anchors across all PDFs for a provider"""
     provider = Provider.query.get_or_404(provider_id)
     
-    # Aggregate anchors from all active PDFs
+    # Aggregate anchors from all active PDFs in a single join
+    rows = db.session.query(Anchor, ProviderPDF.filename).join(
+        ProviderPDF, Anchor.pdf_id == ProviderPDF.id
+    ).filter(
+        ProviderPDF.provider_id == provider.id,
+        ProviderPDF.is_active.is_(True)
+    ).order_by(ProviderPDF.id, Anchor.id).all()
+    
     all_anchors = []
-    for pdf in provider.pdfs:
-        if pdf.is_active:
-            for anchor in pdf.anchors:
-                anchor_dict = anchor.to_dict()
-                anchor_dict['pdfFilename'] = pdf.filename  # Add PDF context
-                all_anchors.append(anchor_dict)
+    for anchor, pdf_filename in rows:
+        anchor_dict = anchor.to_dict()
+        anchor_dict['pdfFilename'] = pdf_filename  # Add PDF context
+        all_anchors.append(anchor_dict)
     
     return jsonify(all_anchors)
 
@@ -139,6 +367,11 @@ def create_anchor_legacy(provider_id):
     if not data.get('text'):
         return jsonify({'error': 'Anchor text is required'}), 400
     
+    try:
+        style = style_columns(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     anchor = Anchor(
         pdf_id=provider_pdf.id,
         text=data['text'],
@@ -146,10 +379,13 @@ def create_anchor_legacy(provider_id):
         y=data.get('y', 0),
         page=data.get('page', '1'),
         canvas_width=data.get('canvasWidth') or provider_pdf.canvas_width,
-        canvas_height=data.get('canvasHeight') or provider_pdf.canvas_height
+        canvas_height=data.get('canvasHeight') or provider_pdf.canvas_height,
+        **style
     )
     
     db.session.add(anchor)
+    provider_pdf.bump_anchor_revision()
     db.session.commit()
+    invalidate_placement_plans(provider_pdf.id)
     
     return jsonify(anchor.to_dict()), 201
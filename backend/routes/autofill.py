@@ -1,16 +1,150 @@
 """
 Auto-Fill Route - Process PDF with anchor settings
-Supports both direct anchor input and PDF-based anchor lookup
+Supports both direct anchor input and PDF-based anchor lookup,
+and filling placeholder anchors with per-request values.
+Single-document results are cached, so repeating a request is served
+without refilling the PDF.
 """
-from flask import Blueprint, request, send_file, jsonify
-from services.pdf_service import place_anchors_on_pdf
+from flask import Blueprint, request, send_file, jsonify, current_app, Response
+from services.pdf_service import place_anchors_on_pdf, get_pdf_content_hash
+from services.batch_service import (
+    fill_batch, fill_records_batch, read_zip_pdfs, stream_results_zip, stream_results_merged
+)
+from services.fill_values import parse_values, read_records
+from services.text_layout import anchor_style
+from services.storage import blob_store
+from services.metrics import metrics
+from services.result_cache import fill_cache
 from models import ProviderPDF
 import io
 import json
+import zipfile
 
 autofill_bp = Blueprint('autofill', __name__)
 
 
+def _read_fill_values():
+    """
+    Values from the request form.
+    
+    Returns:
+        Tuple of (values, records): values is one record from the "values"
+        JSON field, records is a list parsed from a "records" file (CSV,
+        JSONL or JSON array). Either may be None.
+    
+    Raises:
+        ValueError: If the values or records are invalid
+    """
+    values = None
+    values_json = request.form.get('values')
+    if values_json:
+        values = parse_values(values_json)
+    
+    records = None
+    records_file = request.files.get('records')
+    if records_file and records_file.filename:
+        records = read_records(records_file.read(), records_file.filename)
+        if not records:
+            raise ValueError('Records file is empty')
+        max_records = current_app.config['AUTOFILL_MAX_RECORDS']
+        if len(records) > max_records:
+            raise ValueError(f'Too many records (max {max_records})')
+    
+    return values, records
+
+
+def _read_output_mode():
+    """Multi-document output mode from the form ("zip" or "merged")"""
+    output = request.form.get('output', 'zip').lower()
+    if output not in ('zip', 'merged'):
+        raise ValueError('output must be "zip" or "merged"')
+    return output
+
+
+def _stream_results(results, output: str, is_preview: bool):
+    """Stream multi-document results as a ZIP archive or one merged PDF"""
+    if output == 'merged':
+        filename = 'preview_contracts.pdf' if is_preview else 'filled_contracts.pdf'
+        return Response(
+            stream_results_merged(results),
+            mimetype='application/pdf',
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+    
+    prefix = 'preview_' if is_preview else 'filled_'
+    archive_name = 'preview_contracts.zip' if is_preview else 'filled_contracts.zip'
+    
+    return Response(
+        stream_results_zip(results, prefix=prefix),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename={archive_name}'}
+    )
+
+
+def _send_filled(pdf_bytes, content_hash, anchor_set, anchors, canvas_width, canvas_height,
+                 is_preview, values, plan_key=None):
+    """
+    Fill one document, or reuse the cached result of an identical request,
+    and send it with an ETag that is stable for that request.
+    
+    Args:
+        content_hash: SHA-256 of pdf_bytes if already known (else computed)
+        anchor_set: Identity of the anchors for the cache key (plan_key or the anchors)
+    """
+    save_options = current_app.config['AUTOFILL_SAVE_OPTIONS']
+    cache_key = fill_cache.make_key(
+        content_hash or get_pdf_content_hash(pdf_bytes),
+        anchor_set,
+        canvas_width,
+        canvas_height,
+        is_preview,
+        values,
+        save_options
+    )
+    
+    # preview=True: Red text (for verification)
+    # preview=False: White text (for clean final output)
+    result_pdf, _ = fill_cache.get_or_fill(cache_key, lambda: place_anchors_on_pdf(
+        pdf_bytes,
+        anchors,
+        canvas_width,
+        canvas_height,
+        preview=is_preview,
+        plan_key=plan_key,
+        save_options=save_options,
+        values=values
+    ))
+    
+    # Set filename based on mode
+    filename = 'preview_contract.pdf' if is_preview else 'filled_contract.pdf'
+    
+    response = send_file(
+        io.BytesIO(result_pdf),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=filename
+    )
+    response.set_etag(fill_cache.etag(cache_key))
+    return response
+
+
+def _fill_records_response(pdf_bytes, records, anchors, canvas_width, canvas_height,
+                           is_preview, output, plan_key=None):
+    """Fill the template once per record on the process pool and stream the outputs"""
+    results = fill_records_batch(
+        pdf_bytes,
+        records,
+        anchors,
+        canvas_width,
+        canvas_height,
+        preview=is_preview,
+        plan_key=plan_key,
+        max_workers=current_app.config['AUTOFILL_WORKERS'],
+        save_options=current_app.config['AUTOFILL_BATCH_SAVE_OPTIONS']
+    )
+    return _stream_results(results, output, is_preview)
+
+
 @autofill_bp.route('/autofill', methods=['POST'])
 def autofill():
     """
@@ -22,9 +156,13 @@ def autofill():
         - canvasWidth: Canvas width when anchors were placed (optional)
         - canvasHeight: Canvas height when anchors were placed (optional)
         - preview: "true" for red text (preview), "false" for white text (final output)
+        - values: JSON object of placeholder values, e.g. {"signature": "Jane Doe"} (optional)
+        - records: CSV, JSONL or JSON file of many value records (optional)
+        - output: With records, "zip" (default) or "merged"
     
     Returns:
         - Filled PDF as download
+        - With records: one filled PDF per record, as a ZIP or merged PDF (streamed)
     """
     # Validate PDF file
     if 'pdf' not in request.files:
@@ -48,6 +186,12 @@ def autofill():
     if not anchors or len(anchors) == 0:
         return jsonify({'error': 'At least one anchor is required'}), 400
     
+    try:
+        for anchor in anchors:
+            anchor_style(anchor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Get canvas dimensions
     canvas_width = int(request.form.get('canvasWidth', 1224))
     canvas_height = int(request.form.get('canvasHeight', 1584))
@@ -56,31 +200,23 @@ def autofill():
     preview_param = request.form.get('preview', 'false').lower()
     is_preview = preview_param == 'true'
     
+    try:
+        values, records = _read_fill_values()
+        output = _read_output_mode()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Read PDF bytes
     pdf_bytes = pdf_file.read()
     
+    if records is not None:
+        return _fill_records_response(pdf_bytes, records, anchors, canvas_width, canvas_height,
+                                      is_preview, output)
+    
     try:
-        # Process PDF with anchors
-        # preview=True: Red text (for verification)
-        # preview=False: White text (for clean final output)
-        result_pdf = place_anchors_on_pdf(
-            pdf_bytes,
-            anchors,
-            canvas_width,
-            canvas_height,
-            preview=is_preview
-        )
-        
-        # Set filename based on mode
-        filename = 'preview_contract.pdf' if is_preview else 'filled_contract.pdf'
-        
-        # Return filled PDF
-        return send_file(
-            io.BytesIO(result_pdf),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=filename
-        )
+        # Process PDF with anchors (keyed by the anchors themselves)
+        return _send_filled(pdf_bytes, None, anchors, anchors, canvas_width, canvas_height,
+                            is_preview, values)
     
     except Exception as e:
         return jsonify({'error': f'Failed to process PDF: {str(e)}'}), 500
@@ -92,8 +228,12 @@ def autofill_with_pdf_anchors(pdf_id):
     Process uploaded PDF using anchors from a specific saved PDF.
     
     Expects:
-        - pdf: PDF file to process (multipart/form-data)
+        - pdf: PDF file to process (multipart/form-data). Optional when values
+               or records are given: the saved PDF itself is then the template.
         - preview: "true" for red text, "false" for white text
+        - values: JSON object of placeholder values (optional)
+        - records: CSV, JSONL or JSON file of many value records (optional)
+        - output: With records, "zip" (default) or "merged"
     
     Uses:
         - Anchors from the specified PDF ID
@@ -101,6 +241,7 @@ def autofill_with_pdf_anchors(pdf_id):
     
     Returns:
         - Filled PDF as download
+        - With records: one filled PDF per record, as a ZIP or merged PDF (streamed)
     """
     # Get the saved PDF with its anchors
     saved_pdf = ProviderPDF.query.get_or_404(pdf_id)
@@ -108,21 +249,35 @@ def autofill_with_pdf_anchors(pdf_id):
     if not saved_pdf.anchors or len(saved_pdf.anchors) == 0:
         return jsonify({'error': 'No anchor settings found for this PDF'}), 400
     
-    # Validate uploaded PDF file
-    if 'pdf' not in request.files:
-        return jsonify({'error': 'No PDF file provided'}), 400
-    
-    pdf_file = request.files['pdf']
-    
-    if pdf_file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+    try:
+        values, records = _read_fill_values()
+        output = _read_output_mode()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Get preview mode
     preview_param = request.form.get('preview', 'false').lower()
     is_preview = preview_param == 'true'
     
-    # Read PDF bytes
-    pdf_bytes = pdf_file.read()
+    if 'pdf' in request.files:
+        pdf_file = request.files['pdf']
+        
+        if pdf_file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
+        
+        # Read PDF bytes
+        pdf_bytes = pdf_file.read()
+        content_hash = None
+    elif values is not None or records is not None:
+        # Fill the saved template itself
+        file_path = blob_store.resolve(saved_pdf)
+        if not file_path:
+            return jsonify({'error': 'PDF file not found on disk'}), 404
+        with metrics.span('disk_read'), open(file_path, 'rb') as f:
+            pdf_bytes = f.read()
+        content_hash = saved_pdf.content_hash
+    else:
+        return jsonify({'error': 'No PDF file provided'}), 400
     
     # Get anchors from the saved PDF
     anchors = [a.to_dict() for a in saved_pdf.anchors]
@@ -131,23 +286,93 @@ def autofill_with_pdf_anchors(pdf_id):
     canvas_width = saved_pdf.canvas_width or 1224
     canvas_height = saved_pdf.canvas_height or 1584
     
+    if records is not None:
+        return _fill_records_response(pdf_bytes, records, anchors, canvas_width, canvas_height,
+                                      is_preview, output, plan_key=saved_pdf.plan_key)
+    
     try:
-        result_pdf = place_anchors_on_pdf(
-            pdf_bytes,
-            anchors,
-            canvas_width,
-            canvas_height,
-            preview=is_preview
-        )
-        
-        filename = 'preview_contract.pdf' if is_preview else 'filled_contract.pdf'
-        
-        return send_file(
-            io.BytesIO(result_pdf),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=filename
-        )
+        # Keyed by the saved PDF's anchor revision, so anchor edits miss the cache
+        return _send_filled(pdf_bytes, content_hash, saved_pdf.plan_key, anchors, canvas_width,
+                            canvas_height, is_preview, values, plan_key=saved_pdf.plan_key)
     
     except Exception as e:
         return jsonify({'error': f'Failed to process PDF: {str(e)}'}), 500
+
+
+@autofill_bp.route('/autofill/pdf/<int:pdf_id>/batch', methods=['POST'])
+def autofill_batch_with_pdf_anchors(pdf_id):
+    """
+    Process many uploaded PDFs using anchors from a specific saved PDF.
+    
+    Expects (multipart/form-data):
+        - pdfs: One or more PDF files, and/or
+        - zip: A ZIP archive containing PDF files
+        - preview: "true" for red text, "false" for white text
+        - output: "zip" (default) or "merged" for a single PDF, e.g. for printing
+    
+    Anchors and canvas dimensions are resolved once for the whole batch,
+    and the files are filled in parallel on a process pool.
+    
+    Returns:
+        - ZIP archive of filled PDFs (streamed). Files that failed are
+          listed in an errors.json entry inside the archive.
+        - output=merged: One PDF with every filled file in upload order
+          (streamed). Files that failed are listed on a final page.
+    """
+    saved_pdf = ProviderPDF.query.get_or_404(pdf_id)
+    
+    if not saved_pdf.anchors or len(saved_pdf.anchors) == 0:
+        return jsonify({'error': 'No anchor settings found for this PDF'}), 400
+    
+    try:
+        output = _read_output_mode()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Collect (name, bytes) from multipart files and/or a ZIP archive
+    items = []
+    for pdf_file in request.files.getlist('pdfs'):
+        if pdf_file.filename:
+            items.append((pdf_file.filename, pdf_file.read()))
+    
+    max_files = current_app.config['AUTOFILL_BATCH_MAX_FILES']
+    zip_file = request.files.get('zip')
+    if zip_file and zip_file.filename:
+        try:
+            items.extend(read_zip_pdfs(
+                zip_file.stream,
+                max_files=max(0, max_files - len(items)),
+                max_bytes=current_app.config['AUTOFILL_BATCH_MAX_ZIP_BYTES']
+            ))
+        except zipfile.BadZipFile:
+            return jsonify({'error': 'Invalid ZIP archive'}), 400
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
+    if not items:
+        return jsonify({'error': 'No PDF files provided'}), 400
+    
+    if len(items) > max_files:
+        return jsonify({'error': f'Too many files in batch (max {max_files})'}), 400
+    
+    # Get preview mode
+    preview_param = request.form.get('preview', 'false').lower()
+    is_preview = preview_param == 'true'
+    
+    # Resolve anchors and canvas dimensions once per batch
+    anchors = [a.to_dict() for a in saved_pdf.anchors]
+    canvas_width = saved_pdf.canvas_width or 1224
+    canvas_height = saved_pdf.canvas_height or 1584
+    
+    results = fill_batch(
+        items,
+        anchors,
+        canvas_width,
+        canvas_height,
+        preview=is_preview,
+        plan_key=saved_pdf.plan_key,
+        max_workers=current_app.config['AUTOFILL_WORKERS'],
+        save_options=current_app.config['AUTOFILL_BATCH_SAVE_OPTIONS']
+    )
+    
+    return _stream_results(results, output, is_preview)
@@ -0,0 +1,162 @@
+"""
+Job Routes - Submit background auto-fill jobs, poll status, download results
+"""
+import os
+from flask import Blueprint, request, send_file, jsonify
+from models import Job, ProviderPDF
+from services.job_queue import job_queue, QueueFullError
+from services.fill_values import parse_values
+from services.text_layout import anchor_style
+import json
+
+jobs_bp = Blueprint('jobs', __name__)
+
+
+def _submit(pdf_bytes, anchors, canvas_width, canvas_height, is_preview, pdf_id=None, plan_key=None):
+    """Enqueue a job and build the 202 response (503 when the queue is full)"""
+    try:
+        values = parse_values(request.form['values']) if request.form.get('values') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        job = job_queue.submit(
+            pdf_bytes,
+            anchors,
+            canvas_width,
+            canvas_height,
+            preview=is_preview,
+            pdf_id=pdf_id,
+            plan_key=plan_key,
+            values=values
+        )
+    except QueueFullError as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
+    data = job.to_dict()
+    data['statusUrl'] = f'/api/jobs/{job.id}'
+    data['resultUrl'] = f'/api/jobs/{job.id}/result'
+    return jsonify(data), 202
+
+
+# ============ SUBMIT JOBS ============
+
+@jobs_bp.route('/jobs/autofill', methods=['POST'])
+def submit_autofill_job():
+    """
+    Queue an auto-fill job. Same form fields as POST /api/autofill.
+
+    Returns:
+        - 202 with job info (poll statusUrl, then download resultUrl)
+        - 503 with Retry-After if the queue is full
+    """
+    if 'pdf' not in request.files:
+        return jsonify({'error': 'No PDF file provided'}), 400
+
+    pdf_file = request.files['pdf']
+
+    if pdf_file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+
+    anchors_json = request.form.get('anchors')
+    if not anchors_json:
+        return jsonify({'error': 'No anchor settings provided'}), 400
+
+    try:
+        anchors = json.loads(anchors_json)
+    except json.JSONDecodeError:
+        return jsonify({'error': 'Invalid anchor settings JSON'}), 400
+
+    if not anchors or len(anchors) == 0:
+        return jsonify({'error': 'At least one anchor is required'}), 400
+
+    try:
+        for anchor in anchors:
+            anchor_style(anchor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    canvas_width = int(request.form.get('canvasWidth', 1224))
+    canvas_height = int(request.form.get('canvasHeight', 1584))
+    is_preview = request.form.get('preview', 'false').lower() == 'true'
+
+    return _submit(pdf_file.read(), anchors, canvas_width, canvas_height, is_preview)
+
+
+@jobs_bp.route('/jobs/autofill/pdf/<int:pdf_id>', methods=['POST'])
+def submit_autofill_job_with_pdf_anchors(pdf_id):
+    """
+    Queue an auto-fill job using anchors from a saved PDF.
+    Same form fields as POST /api/autofill/pdf/<pdf_id>.
+    """
+    saved_pdf = ProviderPDF.query.get_or_404(pdf_id)
+
+    if not saved_pdf.anchors or len(saved_pdf.anchors) == 0:
+        return jsonify({'error': 'No anchor settings found for this PDF'}), 400
+
+    if 'pdf' not in request.files:
+        return jsonify({'error': 'No PDF file provided'}), 400
+
+    pdf_file = request.files['pdf']
+
+    if pdf_file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+
+    is_preview = request.form.get('preview', 'false').lower() == 'true'
+
+    # Snapshot anchors at submit time so later edits don't change a queued job
+    anchors = [a.to_dict() for a in saved_pdf.anchors]
+    canvas_width = saved_pdf.canvas_width or 1224
+    canvas_height = saved_pdf.canvas_height or 1584
+
+    return _submit(pdf_file.read(), anchors, canvas_width, canvas_height, is_preview,
+                   pdf_id=pdf_id, plan_key=saved_pdf.plan_key)
+
+
+# ============ JOB STATUS & RESULTS ============
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get job status and progress"""
+    job = Job.query.get_or_404(job_id)
+
+    data = job.to_dict()
+    data['queuePosition'] = job_queue.queue_position(job)
+    return jsonify(data)
+
+
+@jobs_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """Download the filled PDF of a finished job"""
+    job = Job.query.get_or_404(job_id)
+
+    if job.status == Job.FAILED:
+        return jsonify({'error': job.error}), 422
+
+    if job.status != Job.DONE:
+        return jsonify({'error': 'Job is not finished yet', 'status': job.status}), 409
+
+    if not job.result_path or not os.path.exists(job.result_path):
+        return jsonify({'error': 'Job result not found on disk'}), 404
+
+    return send_file(
+        job.result_path,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=job.result_filename
+    )
+
+
+@jobs_bp.route('/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    """Delete a finished job and its result file"""
+    job = Job.query.get_or_404(job_id)
+
+    if job.status in (Job.QUEUED, Job.RUNNING):
+        return jsonify({'error': 'Cannot delete a job that is still pending'}), 409
+
+    job_queue.delete(job)
+
+    return jsonify({'message': 'Job deleted', 'id': job_id})
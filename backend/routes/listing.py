@@ -0,0 +1,89 @@
+"""
+Listing helpers - Cursor pagination and sparse-field parameters shared by list endpoints
+
+Query params understood by list endpoints:
+    - limit: Page size (1-200). When given, the response is {items, nextCursor}
+    - cursor: Opaque cursor from a previous page's nextCursor
+    - include: Comma-separated nested data to include (endpoint specific)
+    - fields: Comma-separated top-level keys to return (id is always kept)
+"""
+import base64
+from flask import request
+
+MAX_PAGE_SIZE = 200
+
+
+class ListingError(ValueError):
+    """Invalid listing parameter (reported as 400)"""
+    pass
+
+
+def parse_csv_arg(name: str):
+    """Parse a comma-separated query param into a set, or None if absent"""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return {part.strip() for part in value.split(',') if part.strip()}
+
+
+def parse_limit():
+    """Page size from ?limit=, or None for an unpaginated list"""
+    limit = request.args.get('limit')
+    if limit is None:
+        return None
+    if not limit.isdigit() or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+        raise ListingError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    return int(limit)
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(f'id:{last_id}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    """Last seen id from a cursor (keyset pagination on id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        prefix, last_id = base64.urlsafe_b64decode(padded).decode().split(':', 1)
+        if prefix != 'id':
+            raise ValueError
+        return int(last_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ListingError('Invalid cursor')
+
+
+def paginate(query, id_column, limit):
+    """
+    Apply ?cursor= and limit to a query ordered by id_column.
+
+    Returns:
+        Tuple of (rows, next_cursor or None)
+    """
+    cursor = request.args.get('cursor')
+    if cursor:
+        query = query.filter(id_column > decode_cursor(cursor))
+    query = query.order_by(id_column)
+
+    if limit is None:
+        return query.all(), None
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].id)
+    return rows, None
+
+
+def select_fields(item: dict, fields) -> dict:
+    """Keep only the requested top-level keys (plus id)"""
+    if fields is None:
+        return item
+    return {key: value for key, value in item.items() if key in fields or key == 'id'}
+
+
+def list_response(items: list, limit, next_cursor):
+    """Plain list when unpaginated (backward compatible), envelope when ?limit= is used"""
+    if limit is None:
+        return items
+    return {'items': items, 'nextCursor': next_cursor}
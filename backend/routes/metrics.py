@@ -0,0 +1,21 @@
+"""
+Metrics Route - Prometheus scrape endpoint
+"""
+from flask import Blueprint, Response, jsonify
+from services.metrics import metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Request, stage and SQL query metrics of this worker process.
+    
+    Returns:
+        Prometheus text exposition format (version 0.0.4)
+    """
+    if not metrics.enabled:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -5,9 +5,23 @@ Each PDF has its own anchor settings
 import os
 from flask import Blueprint, request, jsonify, send_file, current_app
 from werkzeug.utils import secure_filename
-from database import db
-from models import Provider, ProviderPDF
-from services.pdf_service import get_pdf_page_count, render_page_as_image, get_pdf_content_hash
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from database import db, read_replica
+from models import Provider, ProviderPDF, PageFingerprint, PageGeometry
+from services.pdf_service import (
+    get_file_text_fingerprint, get_file_page_index, render_document_page, get_file_content_hash,
+    get_stream_content_hash, spool_stream_to_file, get_page_geometry, measure_document,
+    get_placement_plan, draw_anchor_markers, get_anchor_preview, IMAGE_FORMATS
+)
+from services.page_cache import page_cache
+from services.document_pool import document_pool
+from services.storage import blob_store
+from routes.listing import (
+    ListingError, parse_csv_arg, parse_limit, paginate, select_fields, list_response
+)
 import io
 
 pdfs_bp = Blueprint('pdfs', __name__)
@@ -23,19 +37,47 @@ def allowed_file(filename):
 # ============ LIST PDFs FOR PROVIDER ============
 
 @pdfs_bp.route('/providers/<int:provider_id>/pdfs', methods=['GET'])
+@read_replica
 def list_pdfs(provider_id):
-    """List all PDFs for a provider"""
+    """
+    List all PDFs for a provider.
+    
+    Query params:
+        - include_inactive: "true" to include soft-deleted PDFs
+        - include: "anchors" (default). Pass an empty value (include=) for anchorCount only.
+        - fields: Top-level keys to return
+        - limit / cursor: Cursor pagination (response becomes {items, nextCursor})
+    """
     provider = Provider.query.get_or_404(provider_id)
     
     # Filter by active status (soft delete)
     include_inactive = request.args.get('include_inactive', 'false').lower() == 'true'
+    include = parse_csv_arg('include')
+    fields = parse_csv_arg('fields')
+    include_anchors = include is None or 'anchors' in include
     
-    if include_inactive:
-        pdfs = provider.pdfs
+    query = ProviderPDF.query.filter_by(provider_id=provider.id)
+    if include_anchors:
+        # Anchors for all PDFs are loaded in one extra query
+        query = query.options(selectinload(ProviderPDF.anchors))
+    if not include_inactive:
+        query = query.filter_by(is_active=True)
+    
+    try:
+        limit = parse_limit()
+        pdfs, next_cursor = paginate(query, ProviderPDF.id, limit)
+    except ListingError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if include_anchors:
+        items = [pdf.to_dict() for pdf in pdfs]
     else:
-        pdfs = [pdf for pdf in provider.pdfs if pdf.is_active]
+        counts = ProviderPDF.anchor_counts([pdf.id for pdf in pdfs])
+        items = [pdf.to_dict(include_anchors=False, anchor_count=counts.get(pdf.id, 0)) for pdf in pdfs]
     
-    return jsonify([pdf.to_dict() for pdf in pdfs])
+    items = [select_fields(item, fields) for item in items]
+    
+    return jsonify(list_response(items, limit, next_cursor))
 
 
 # ============ UPLOAD NEW PDF ============
@@ -56,47 +98,30 @@ def upload_pdf(provider_id):
     if not allowed_file(file.filename):
         return jsonify({'error': 'Only PDF files are allowed'}), 400
     
-    # Read PDF bytes for hash and page count
-    pdf_bytes = file.read()
-    file.seek(0)  # Reset file pointer
+    # Create uploads directory if it doesn't exist
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    os.makedirs(upload_folder, exist_ok=True)
     
-    # Generate content hash for duplicate detection
-    content_hash = get_pdf_content_hash(pdf_bytes)
+    # Stream upload to a temp file while hashing (never held fully in memory)
+    temp_path, content_hash, file_size = spool_stream_to_file(file.stream, upload_folder)
     
-    # Check for duplicate PDF within SAME provider
-    existing_pdf = ProviderPDF.query.filter_by(
-        provider_id=provider_id, 
-        content_hash=content_hash,
-        is_active=True
-    ).first()
+    # Check for duplicate PDF within SAME provider (fast path; the unique
+    # constraint below settles concurrent uploads of the same file)
+    existing_pdf = ProviderPDF.find_active_duplicate(provider_id, content_hash)
     
     if existing_pdf:
-        return jsonify({
-            'warning': 'duplicate_found',
-            'message': f'This PDF is already uploaded as: {existing_pdf.filename}',
-            'existingPdfId': existing_pdf.id,
-            'existingFilename': existing_pdf.filename
-        }), 409  # Conflict
+        os.remove(temp_path)
+        return _duplicate_response(existing_pdf)
     
     # Secure the filename
     original_filename = secure_filename(file.filename)
     
-    # Create uploads directory if it doesn't exist
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    os.makedirs(upload_folder, exist_ok=True)
-    
-    # Create unique filename with provider ID and timestamp
-    import time
-    timestamp = int(time.time())
-    unique_filename = f"provider_{provider_id}_{timestamp}_{original_filename}"
-    file_path = os.path.join(upload_folder, unique_filename)
-    
-    # Save file
-    file.save(file_path)
-    
-    # Get file info
-    file_size = os.path.getsize(file_path)
-    total_pages = get_pdf_page_count(pdf_bytes)
+    # Count pages, fingerprint page text and measure pages from the spooled file (opened by path)
+    try:
+        total_pages, text_hash, page_hashes, geometry = get_file_page_index(temp_path)
+    except Exception:
+        os.remove(temp_path)
+        return jsonify({'error': 'File is not a valid PDF'}), 400
     
     # Get canvas dimensions from request (for coordinate conversion)
     canvas_width = request.form.get('canvasWidth', type=int)
@@ -106,21 +131,132 @@ def upload_pdf(provider_id):
     provider_pdf = ProviderPDF(
         provider_id=provider.id,
         filename=original_filename,
-        file_path=file_path,
+        file_path=blob_store.locator(content_hash),
         file_size=file_size,
         total_pages=total_pages,
         canvas_width=canvas_width,
         canvas_height=canvas_height,
         content_hash=content_hash,
+        text_hash=text_hash,
         is_active=True
     )
     
     db.session.add(provider_pdf)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent upload of the same file for this provider committed first
+        db.session.rollback()
+        existing_pdf = ProviderPDF.find_active_duplicate(provider_id, content_hash)
+        os.remove(temp_path)
+        if not existing_pdf:
+            raise
+        return _duplicate_response(existing_pdf)
+    
+    _store_fingerprints(content_hash, page_hashes)
+    _store_geometry(content_hash, geometry)
+    
+    # Store bytes after the record exists, so a concurrent hard delete of the
+    # last other reference can't remove the blob out from under it
+    try:
+        blob_store.put(temp_path, content_hash)
+    except Exception as e:
+        # Don't leave an active record pointing at missing bytes (it would also block a retry)
+        _discard_upload(provider_pdf, temp_path)
+        return jsonify({'error': f'Failed to store PDF: {str(e)}'}), 500
+    file_path = blob_store.local_path(content_hash)
+    
+    # Warm the page cache so the first editor load doesn't rasterize every page
+    if current_app.config['PAGE_PRERENDER'] and total_pages:
+        page_cache.prerender(
+            content_hash,
+            file_path,
+            total_pages,
+            specs=[
+                {'width': current_app.config['PAGE_THUMBNAIL_WIDTH'], 'fmt': 'png'},
+                {'dpi': current_app.config['PAGE_DEFAULT_DPI'], 'fmt': 'png'}
+            ]
+        )
     
     return jsonify(provider_pdf.to_dict()), 201
 
 
+def _discard_upload(provider_pdf, temp_path):
+    """Delete a just-created record whose bytes could not be stored, with its temp file"""
+    content_hash = provider_pdf.content_hash
+    db.session.delete(provider_pdf)
+    db.session.commit()
+    
+    if not ProviderPDF.find_by_hash(content_hash):
+        PageFingerprint.remove(content_hash)
+        PageGeometry.remove(content_hash)
+        db.session.commit()
+    
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+def _duplicate_response(existing_pdf):
+    """409 response pointing at the provider's active copy of an uploaded file"""
+    return jsonify({
+        'warning': 'duplicate_found',
+        'message': f'This PDF is already uploaded as: {existing_pdf.filename}',
+        'existingPdfId': existing_pdf.id,
+        'existingFilename': existing_pdf.filename
+    }), 409  # Conflict
+
+
+def _store_fingerprints(content_hash, page_hashes):
+    """Index a file's page text once per content hash (concurrent uploads may race to it)"""
+    if not page_hashes or PageFingerprint.exists_for(content_hash):
+        return
+    try:
+        PageFingerprint.store(content_hash, page_hashes)
+        db.session.commit()
+    except IntegrityError:
+        # Another upload of the same bytes indexed it first
+        db.session.rollback()
+
+
+def _store_geometry(content_hash, geometry):
+    """Save a file's page geometry once per content hash (concurrent uploads may race to it)"""
+    if not geometry or PageGeometry.exists_for(content_hash):
+        return
+    try:
+        PageGeometry.store(content_hash, geometry)
+        db.session.commit()
+    except IntegrityError:
+        # Another upload of the same bytes measured it first
+        db.session.rollback()
+
+
+def _measure_stored(provider_pdf, file_path):
+    """
+    Measure and save the pages of a PDF uploaded before page geometry was stored.
+    
+    Raises:
+        ValueError: If the stored file can't be parsed (nothing is saved)
+    """
+    try:
+        with document_pool.open(provider_pdf.content_hash, file_path) as doc:
+            geometry = measure_document(doc)
+    except Exception:
+        raise ValueError('Stored file is not a valid PDF')
+    _store_geometry(provider_pdf.content_hash, geometry)
+    return geometry
+
+
+def _page_geometry(provider_pdf, file_path):
+    """(width, height, rotation) per page of a stored PDF (needs a content hash)"""
+    def load():
+        geometry = PageGeometry.plan_geometry(provider_pdf.content_hash)
+        if not geometry:
+            geometry = tuple(row[1:4] for row in _measure_stored(provider_pdf, file_path))
+        return geometry
+    
+    return get_page_geometry(provider_pdf.content_hash, load)
+
+
 # ============ GET SINGLE PDF ============
 
 @pdfs_bp.route('/pdfs/<int:pdf_id>', methods=['GET'])
@@ -128,11 +264,12 @@ def get_pdf(pdf_id):
     """Download a specific PDF by ID"""
     provider_pdf = ProviderPDF.query.get_or_404(pdf_id)
     
-    if not os.path.exists(provider_pdf.file_path):
+    file_path = blob_store.resolve(provider_pdf)
+    if not file_path:
         return jsonify({'error': 'PDF file not found on disk'}), 404
     
     return send_file(
-        provider_pdf.file_path,
+        file_path,
         mimetype='application/pdf',
         as_attachment=True,
         download_name=provider_pdf.filename
@@ -141,9 +278,29 @@ def get_pdf(pdf_id):
 
 @pdfs_bp.route('/pdfs/<int:pdf_id>/info', methods=['GET'])
 def get_pdf_info(pdf_id):
-    """Get PDF info without downloading"""
+    """
+    Get PDF info without downloading.
+    
+    Includes per-page geometry (displayed width/height in points, rotation,
+    CropBox and MediaBox). PDFs uploaded before page geometry was stored are
+    measured on first request.
+    """
     provider_pdf = ProviderPDF.query.get_or_404(pdf_id)
-    return jsonify(provider_pdf.to_dict())
+    data = provider_pdf.to_dict()
+    
+    pages = PageGeometry.for_file(provider_pdf.content_hash) if provider_pdf.content_hash else []
+    if not pages:
+        file_path = _resolve_with_hash(provider_pdf)
+        if file_path:
+            try:
+                _measure_stored(provider_pdf, file_path)
+                pages = PageGeometry.for_file(provider_pdf.content_hash)
+            except ValueError as e:
+                # Metadata is still served; only the page list is unavailable
+                data['pagesError'] = str(e)
+    
+    data['pages'] = [page.to_dict() for page in pages]
+    return jsonify(data)
 
 
 # ============ UPDATE PDF ============
@@ -164,7 +321,17 @@ def update_pdf(pdf_id):
     if 'isActive' in data:
         provider_pdf.is_active = data['isActive']
     
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Reactivating while another active copy of the same file exists
+        db.session.rollback()
+        existing_pdf = ProviderPDF.find_active_duplicate(
+            provider_pdf.provider_id, provider_pdf.content_hash, exclude_id=provider_pdf.id
+        )
+        if not existing_pdf:
+            raise
+        return _duplicate_response(existing_pdf)
     
     return jsonify(provider_pdf.to_dict())
 
@@ -185,42 +352,214 @@ def delete_pdf(pdf_id):
 
 @pdfs_bp.route('/pdfs/<int:pdf_id>/hard-delete', methods=['DELETE'])
 def hard_delete_pdf(pdf_id):
-    """Permanently delete a PDF and its file"""
+    """Permanently delete a PDF (file bytes are removed with the last reference)"""
     provider_pdf = ProviderPDF.query.get_or_404(pdf_id)
     
-    # Delete file from disk
-    if os.path.exists(provider_pdf.file_path):
-        os.remove(provider_pdf.file_path)
+    content_hash = provider_pdf.content_hash
+    file_path = provider_pdf.file_path
+    is_blob = blob_store.owns(file_path)
     
     # Delete database record (cascades to anchors)
     db.session.delete(provider_pdf)
     db.session.commit()
     
+    # Other records (any provider, active or not) may share the same content
+    last_reference = bool(content_hash) and not ProviderPDF.find_by_hash(content_hash)
+    
+    if last_reference:
+        PageFingerprint.remove(content_hash)
+        PageGeometry.remove(content_hash)
+        db.session.commit()
+        document_pool.invalidate(content_hash)
+        page_cache.purge(content_hash)
+        if is_blob:
+            blob_store.delete(content_hash)
+    
+    # Legacy flat files belong to a single record
+    if not is_blob and file_path and os.path.exists(file_path):
+        os.remove(file_path)
+    
     return jsonify({'message': 'PDF permanently deleted', 'pdfId': pdf_id})
 
 
 # ============ GET PDF PAGE AS IMAGE ============
 
+def _render_args():
+    """
+    Parse dpi, width and format query params.
+    
+    Raises:
+        ValueError: If a param is out of range
+    
+    Returns:
+        Tuple of (dpi, width, fmt)
+    """
+    dpi = request.args.get('dpi', current_app.config['PAGE_DEFAULT_DPI'], type=int)
+    width = request.args.get('width', type=int)
+    fmt = request.args.get('format', 'png').lower()
+    if fmt == 'jpg':
+        fmt = 'jpeg'
+    
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f'Unsupported format. Use one of: {", ".join(IMAGE_FORMATS)}')
+    if not 36 <= dpi <= current_app.config['PAGE_MAX_DPI']:
+        raise ValueError(f'dpi must be between 36 and {current_app.config["PAGE_MAX_DPI"]}')
+    if width is not None and not 16 <= width <= current_app.config['PAGE_MAX_WIDTH']:
+        raise ValueError(f'width must be between 16 and {current_app.config["PAGE_MAX_WIDTH"]}')
+    
+    return dpi, width, fmt
+
+
+def _resolve_with_hash(provider_pdf):
+    """Local file path of a PDF record (None if missing), hashing older records on first use"""
+    file_path = blob_store.resolve(provider_pdf)
+    
+    # Older records may predate content hashing; hash once and store it
+    if file_path and not provider_pdf.content_hash:
+        content_hash = get_file_content_hash(file_path)
+        provider_pdf.content_hash = content_hash
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # The provider already has an active copy of this file (older rows
+            # predate duplicate checks): keep the hash for this request only
+            db.session.rollback()
+            set_committed_value(provider_pdf, 'content_hash', content_hash)
+    
+    return file_path
+
+
+def _not_modified(etag, **cache_control):
+    """304 response for a matching If-None-Match"""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    for directive, value in cache_control.items():
+        setattr(response.cache_control, directive, value)
+    return response
+
+
 @pdfs_bp.route('/pdfs/<int:pdf_id>/page/<int:page_num>', methods=['GET'])
 def get_pdf_page(pdf_id, page_num):
-    """Get specific page as image (for preview)"""
+    """
+    Get specific page as image (for preview), served from the page cache.
+    
+    Query params:
+        - dpi: Render resolution (default 150)
+        - width: Target width in pixels, e.g. for thumbnails (overrides dpi)
+        - format: "png" (default), "jpeg" or "webp"
+    """
     provider_pdf = ProviderPDF.query.get_or_404(pdf_id)
     
-    if not os.path.exists(provider_pdf.file_path):
+    try:
+        dpi, width, fmt = _render_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    file_path = _resolve_with_hash(provider_pdf)
+    if not file_path:
         return jsonify({'error': 'PDF file not found on disk'}), 404
     
+    key = page_cache.make_key(provider_pdf.content_hash, page_num, dpi, width, fmt)
+    etag = page_cache.etag(key)
+    max_age = current_app.config['PAGE_CACHE_MAX_AGE']
+    
+    # Browser already has this exact image
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag, private=True, max_age=max_age)
+    
+    def render():
+        with document_pool.open(provider_pdf.content_hash, file_path) as doc:
+            return render_document_page(doc, page_num, dpi, width, fmt)
+    
+    try:
+        image_bytes = page_cache.get_or_render(key, render)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = send_file(
+        io.BytesIO(image_bytes),
+        mimetype=IMAGE_FORMATS[fmt],
+        as_attachment=False,
+        etag=etag,
+        max_age=max_age
+    )
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
+
+
+@pdfs_bp.route('/pdfs/<int:pdf_id>/preview/<int:page_num>', methods=['GET'])
+def get_pdf_preview(pdf_id, page_num):
+    """
+    Page image with the PDF's anchors marked on it (PNG).
+    
+    The page comes from the page cache and markers are drawn on the image,
+    so no PDF is generated or downloaded. Each anchor gets a square at its
+    point and an outline of its text box.
+    
+    Query params:
+        - dpi: Render resolution (default 150)
+        - width: Target width in pixels (overrides dpi)
+    """
+    provider_pdf = ProviderPDF.query.get_or_404(pdf_id)
+    
     try:
-        with open(provider_pdf.file_path, 'rb') as f:
-            pdf_bytes = f.read()
-            image_bytes = render_page_as_image(pdf_bytes, page_num)
+        dpi, width, _ = _render_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    file_path = _resolve_with_hash(provider_pdf)
+    if not file_path:
+        return jsonify({'error': 'PDF file not found on disk'}), 404
+    
+    key = page_cache.make_key(provider_pdf.content_hash, page_num, dpi, width, 'png')
+    
+    # Markers depend on the anchors and the canvas they were placed on
+    # (PUT /pdfs/<id> can change the canvas without an anchor revision)
+    canvas_width = provider_pdf.canvas_width or 1224
+    canvas_height = provider_pdf.canvas_height or 1584
+    
+    # Revalidate on every view
+    etag = f'{page_cache.etag(key)}-r{provider_pdf.anchor_revision}-c{canvas_width}x{canvas_height}'
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag, private=True, no_cache=True)
+    
+    def render():
+        with document_pool.open(provider_pdf.content_hash, file_path) as doc:
+            return render_document_page(doc, page_num, dpi, width, 'png')
+    
+    def build():
+        # Stored geometry: no need to load every page of the document
+        page_geometry = _page_geometry(provider_pdf, file_path)
+        if page_num < 1 or page_num > len(page_geometry):
+            raise ValueError(f'Page {page_num} not found in PDF')
+        
+        image_bytes = page_cache.get_or_render(key, render)
         
-        return send_file(
-            io.BytesIO(image_bytes),
-            mimetype='image/png',
-            as_attachment=False
+        plan = get_placement_plan(
+            [a.to_dict() for a in provider_pdf.anchors],
+            canvas_width,
+            canvas_height,
+            page_geometry,
+            preview=True,
+            plan_key=provider_pdf.plan_key
         )
+        return draw_anchor_markers(image_bytes, plan, page_num - 1, page_geometry[page_num - 1])
+    
+    try:
+        preview_bytes = get_anchor_preview((key, provider_pdf.plan_key, canvas_width, canvas_height), build)
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
+    
+    response = send_file(
+        io.BytesIO(preview_bytes),
+        mimetype='image/png',
+        as_attachment=False,
+        etag=etag
+    )
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 
 # ============ DUPLICATE CHECK ============
@@ -232,10 +571,9 @@ def check_pdf_duplicate():
         return jsonify({'error': 'No PDF file provided'}), 400
     
     file = request.files['pdf']
-    pdf_bytes = file.read()
     
-    # Generate content hash
-    content_hash = get_pdf_content_hash(pdf_bytes)
+    # Generate content hash (streamed in chunks)
+    content_hash = get_stream_content_hash(file.stream)
     
     # Check for existing PDF
     existing_pdf = ProviderPDF.find_by_hash(content_hash)
@@ -255,6 +593,174 @@ def check_pdf_duplicate():
     })
 
 
+DEFAULT_MIN_SIMILARITY = 0.5
+MAX_SIMILAR_RESULTS = 100
+
+
+def _similarity_args():
+    """
+    Parse minSimilarity and limit (query string or form).
+    
+    Raises:
+        ValueError: If a param is out of range
+    """
+    min_similarity = request.values.get('minSimilarity', DEFAULT_MIN_SIMILARITY, type=float)
+    limit = request.values.get('limit', 20, type=int)
+    if not 0 < min_similarity <= 1:
+        raise ValueError('minSimilarity must be greater than 0 and at most 1')
+    if not 1 <= limit <= MAX_SIMILAR_RESULTS:
+        raise ValueError(f'limit must be between 1 and {MAX_SIMILAR_RESULTS}')
+    return min_similarity, limit
+
+
+def _find_similar(content_hash, text_hash, page_hashes, min_similarity, limit, exclude_pdf_id=None):
+    """
+    Active PDFs whose page text overlaps a file's.
+    
+    Similarity is the Jaccard index of the two files' distinct page text
+    hashes, found through the text_hash index (no file is opened).
+    
+    Returns:
+        List of match dictionaries, most similar first
+    """
+    query_hashes = {page_hash for _, page_hash in page_hashes}
+    
+    scores = {content_hash: (1.0, len(query_hashes))}  # Same bytes
+    if query_hashes:
+        matches = PageFingerprint.match_counts(query_hashes)
+        # Only the strongest candidates need their page counts
+        candidates = sorted(matches, key=matches.get, reverse=True)[:limit * 5]
+        page_counts = PageFingerprint.distinct_page_counts(candidates)
+        for candidate in candidates:
+            matched = matches[candidate]
+            union = len(query_hashes) + page_counts.get(candidate, matched) - matched
+            score = matched / union
+            if score >= min_similarity and candidate != content_hash:
+                scores[candidate] = (score, matched)
+    
+    conditions = [ProviderPDF.content_hash.in_(list(scores))]
+    if text_hash:
+        conditions.append(ProviderPDF.text_hash == text_hash)
+    query = ProviderPDF.query.filter(ProviderPDF.is_active.is_(True), or_(*conditions))
+    if exclude_pdf_id is not None:
+        query = query.filter(ProviderPDF.id != exclude_pdf_id)
+    
+    results = []
+    for pdf in query.all():
+        if pdf.content_hash == content_hash:
+            match, (score, matched) = 'identical', scores[content_hash]
+        elif text_hash and pdf.text_hash == text_hash:
+            match, score, matched = 'sameText', 1.0, len(query_hashes)
+        else:
+            match, (score, matched) = 'similar', scores[pdf.content_hash]
+        results.append((score, pdf, match, matched))
+    
+    results.sort(key=lambda item: (-item[0], item[1].id))
+    results = results[:limit]
+    
+    provider_ids = {pdf.provider_id for _, pdf, _, _ in results}
+    providers = dict(
+        db.session.query(Provider.id, Provider.name).filter(Provider.id.in_(provider_ids)).all()
+    ) if provider_ids else {}
+    
+    return [
+        {
+            'pdfId': pdf.id,
+            'providerId': str(pdf.provider_id),
+            'providerName': providers.get(pdf.provider_id),
+            'filename': pdf.filename,
+            'match': match,
+            'similarity': round(score, 4),
+            'matchedPages': matched
+        }
+        for score, pdf, match, matched in results
+    ]
+
+
+@pdfs_bp.route('/pdf/find-similar', methods=['POST'])
+def find_similar_pdfs():
+    """
+    Find stored PDFs with the same or overlapping text (without uploading).
+    
+    Expects (multipart/form-data):
+        - pdf: PDF file
+        - minSimilarity: Lowest similarity to report, 0-1 (default 0.5)
+        - limit: Maximum matches (default 20)
+    
+    Returns:
+        Matches with match type "identical" (same bytes), "sameText" (same
+        text, e.g. re-exported with new metadata) or "similar" (share pages),
+        and the similarity (shared / combined distinct pages)
+    """
+    if 'pdf' not in request.files:
+        return jsonify({'error': 'No PDF file provided'}), 400
+    
+    try:
+        min_similarity, limit = _similarity_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    os.makedirs(upload_folder, exist_ok=True)
+    temp_path, content_hash, _ = spool_stream_to_file(request.files['pdf'].stream, upload_folder)
+    
+    try:
+        total_pages, text_hash, page_hashes = get_file_text_fingerprint(temp_path)
+    except Exception:
+        return jsonify({'error': 'File is not a valid PDF'}), 400
+    finally:
+        os.remove(temp_path)
+    
+    return jsonify({
+        'contentHash': content_hash,
+        'textHash': text_hash,
+        'totalPages': total_pages,
+        'textPages': len(page_hashes),
+        'matches': _find_similar(content_hash, text_hash, page_hashes, min_similarity, limit)
+    })
+
+
+@pdfs_bp.route('/pdfs/<int:pdf_id>/similar', methods=['GET'])
+def get_similar_pdfs(pdf_id):
+    """
+    Find other stored PDFs with the same or overlapping text as a saved PDF.
+    
+    Query params and response as for POST /pdf/find-similar. PDFs uploaded
+    before fingerprinting are indexed on first use.
+    """
+    provider_pdf = ProviderPDF.query.get_or_404(pdf_id)
+    
+    try:
+        min_similarity, limit = _similarity_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    page_hashes = PageFingerprint.page_hashes(provider_pdf.content_hash) if provider_pdf.content_hash else []
+    
+    if not page_hashes and provider_pdf.text_hash is None:
+        # Older record (or a file without text): fingerprint it now
+        file_path = _resolve_with_hash(provider_pdf)
+        if not file_path:
+            return jsonify({'error': 'PDF file not found on disk'}), 404
+        try:
+            _, text_hash, page_hashes = get_file_text_fingerprint(file_path)
+        except Exception:
+            # Legacy file that can't be parsed: nothing to fingerprint (and nothing stored)
+            return jsonify({'error': 'Stored file is not a valid PDF'}), 422
+        provider_pdf.text_hash = text_hash
+        db.session.commit()
+        _store_fingerprints(provider_pdf.content_hash, page_hashes)
+    
+    return jsonify({
+        'pdfId': provider_pdf.id,
+        'textHash': provider_pdf.text_hash,
+        'totalPages': provider_pdf.total_pages,
+        'textPages': len(page_hashes),
+        'matches': _find_similar(provider_pdf.content_hash, provider_pdf.text_hash, page_hashes,
+                                 min_similarity, limit, exclude_pdf_id=provider_pdf.id)
+    })
+
+
 # ============ BACKWARD COMPATIBILITY ============
 # These routes support the old single-PDF-per-provider pattern
 
@@ -278,11 +784,12 @@ def get_pdf_legacy(provider_id):
     if not provider_pdf:
         return jsonify({'error': 'No PDF found for this provider'}), 404
     
-    if not os.path.exists(provider_pdf.file_path):
+    file_path = blob_store.resolve(provider_pdf)
+    if not file_path:
         return jsonify({'error': 'PDF file not found on disk'}), 404
     
     return send_file(
-        provider_pdf.file_path,
+        file_path,
         mimetype='application/pdf',
         as_attachment=True,
         download_name=provider_pdf.filename
@@ -2,29 +2,76 @@
 Provider Routes - CRUD operations for energy providers
 """
 from flask import Blueprint, request, jsonify
-from database import db
+from database import db, read_replica
 from models import Provider
+from routes.listing import (
+    ListingError, parse_csv_arg, parse_limit, paginate, select_fields, list_response
+)
 
 providers_bp = Blueprint('providers', __name__)
 
 
 @providers_bp.route('/providers', methods=['GET'])
+@read_replica
 def get_providers():
-    """Get all providers (optionally include inactive)"""
+    """
+    Get all providers (optionally include inactive).
+    
+    Query params:
+        - include_inactive: "true" to include soft-deleted providers
+        - q: Case-insensitive name search
+        - include: Nested data, any of "pdfs", "anchors" (default: both).
+                   Pass an empty value (include=) for counts only.
+        - fields: Top-level keys to return, e.g. fields=name,pdfCount
+        - limit / cursor: Cursor pagination (response becomes {items, nextCursor})
+    """
     include_inactive = request.args.get('include_inactive', 'false').lower() == 'true'
+    search = request.args.get('q', '').strip()
+    include = parse_csv_arg('include')
+    fields = parse_csv_arg('fields')
+    
+    if include is None:
+        include = {'pdfs', 'anchors'}
+    include_pdfs = 'pdfs' in include
+    include_anchors = 'anchors' in include
+    
+    try:
+        limit = parse_limit()
+        
+        if include_pdfs or include_anchors:
+            # PDFs and anchors are loaded with one extra query each (selectin), not per row
+            query = Provider.query_with_pdfs()
+        else:
+            query = Provider.query
+        
+        if not include_inactive:
+            query = query.filter_by(is_active=True)
+        
+        if search:
+            escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            query = query.filter(Provider.name.ilike(f'%{escaped}%', escape='\\'))
+        
+        providers, next_cursor = paginate(query, Provider.id, limit)
+    except ListingError as e:
+        return jsonify({'error': str(e)}), 400
     
-    if include_inactive:
-        providers = Provider.query.all()
+    if include_pdfs or include_anchors:
+        items = [p.to_dict(include_pdfs=include_pdfs, include_anchors=include_anchors) for p in providers]
     else:
-        providers = Provider.query.filter_by(is_active=True).all()
+        # Counts only: one GROUP BY instead of loading PDFs and anchors
+        counts = Provider.aggregate_counts([p.id for p in providers])
+        items = [p.to_dict(include_pdfs=False, counts=counts.get(p.id, (0, 0))) for p in providers]
     
-    return jsonify([p.to_dict() for p in providers])
+    items = [select_fields(item, fields) for item in items]
+    
+    return jsonify(list_response(items, limit, next_cursor))
 
 
 @providers_bp.route('/providers/<int:provider_id>', methods=['GET'])
+@read_replica
 def get_provider(provider_id):
     """Get single provider by ID"""
-    provider = Provider.query.get_or_404(provider_id)
+    provider = Provider.query_with_pdfs().get_or_404(provider_id)
     return jsonify(provider.to_dict())
 
 
@@ -61,6 +108,8 @@ def update_provider(provider_id):
     
     db.session.commit()
     
+    # Reload with PDFs and anchors eagerly (commit expired the instance)
+    provider = Provider.query_with_pdfs().filter_by(id=provider_id).one()
     return jsonify(provider.to_dict())
 
 
@@ -81,4 +130,6 @@ def restore_provider(provider_id):
     provider.is_active = True
     db.session.commit()
     
+    # Reload with PDFs and anchors eagerly (commit expired the instance)
+    provider = Provider.query_with_pdfs().filter_by(id=provider_id).one()
     return jsonify(provider.to_dict())
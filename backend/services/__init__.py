@@ -1,6 +1,12 @@
 """
 Services package
 """
-from .pdf_service import place_anchors_on_pdf, determine_pages, convert_coordinates
+from .pdf_service import (
+    place_anchors_on_pdf, determine_pages, validate_page_setting, convert_coordinates,
+    convert_coordinates_batch, compile_placement_plan, get_placement_plan, invalidate_placement_plans
+)
 
-__all__ = ['place_anchors_on_pdf', 'determine_pages', 'convert_coordinates']
+__all__ = [
+    'place_anchors_on_pdf', 'determine_pages', 'validate_page_setting', 'convert_coordinates',
+    'convert_coordinates_batch', 'compile_placement_plan', 'get_placement_plan', 'invalidate_placement_plans'
+]
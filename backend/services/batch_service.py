@@ -0,0 +1,353 @@
+"""
+Batch Service - Fan auto-fill work out across a process pool
+PyMuPDF is CPU-bound and holds the GIL, so batches use processes, not threads
+"""
+import io
+import os
+import json
+import multiprocessing
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # PyMuPDF
+
+from .pdf_service import place_anchors_on_pdf, fill_records
+
+_executor = None
+_executor_workers = None
+
+# Pool workers are never forked from the (multi-threaded) web process: a fork
+# can copy locks held by other threads (logging, DB pool, MuPDF) and deadlock.
+# The fork server is a clean single-threaded process with PyMuPDF preloaded.
+_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def new_process_pool(max_workers: int = None) -> ProcessPoolExecutor:
+    """Process pool whose workers start from the fork server (see above)"""
+    context = multiprocessing.get_context(_START_METHOD)
+    if _START_METHOD == 'forkserver':
+        context.set_forkserver_preload([__name__])
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+
+
+def get_executor(max_workers: int = None) -> ProcessPoolExecutor:
+    """
+    Get the shared process pool for this worker (created lazily).
+
+    Args:
+        max_workers: Pool size (defaults to CPU count)
+
+    Returns:
+        ProcessPoolExecutor instance
+    """
+    global _executor, _executor_workers
+
+    if _executor is None or _executor_workers != max_workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = new_process_pool(max_workers)
+        _executor_workers = max_workers
+
+    return _executor
+
+
+def shutdown_executor():
+    """Shut down the shared process pool (e.g. on worker exit)."""
+    global _executor, _executor_workers
+
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+        _executor_workers = None
+
+
+def fill_one(job: tuple) -> tuple:
+    """
+    Process a single PDF inside a pool worker.
+
+    Args:
+        job: Tuple of (name, pdf_bytes, anchors, canvas_width, canvas_height, preview,
+             plan_key, save_options, values)
+
+    Returns:
+        Tuple of (name, result_bytes or None, error message or None)
+    """
+    name, pdf_bytes, anchors, canvas_width, canvas_height, preview, plan_key, save_options, values = job
+    try:
+        result = place_anchors_on_pdf(pdf_bytes, anchors, canvas_width, canvas_height,
+                                      preview=preview, plan_key=plan_key, save_options=save_options,
+                                      values=values)
+        return name, result, None
+    except Exception as e:
+        return name, None, str(e)
+
+
+def fill_batch(items: list, anchors: list, canvas_width: int, canvas_height: int,
+               preview: bool = False, plan_key: tuple = None, max_workers: int = None,
+               save_options: dict = None):
+    """
+    Place the same anchors on many PDFs using the process pool.
+
+    Args:
+        items: List of (name, pdf_bytes) tuples
+        anchors: List of anchor dictionaries (resolved once for the batch)
+        canvas_width: Width of canvas when anchors were placed
+        canvas_height: Height of canvas when anchors were placed
+        preview: If True, use red text. If False, use white text.
+        plan_key: Anchor set identity for the placement plan cache
+        max_workers: Process pool size
+        save_options: Output save options (see place_anchors_on_pdf)
+
+    Yields:
+        Tuples of (name, result_bytes or None, error message or None), in input order
+    """
+    global _executor
+
+    jobs = [(name, pdf_bytes, anchors, canvas_width, canvas_height, preview, plan_key, save_options, None)
+            for name, pdf_bytes in items]
+
+    try:
+        yield from get_executor(max_workers).map(fill_one, jobs)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM); drop the pool so the next batch starts fresh
+        _executor = None
+        raise
+
+
+# Records filled per pool task (template is sent and parsed once per chunk)
+RECORD_CHUNK_SIZE = 50
+
+
+def fill_record_chunk(job: tuple) -> list:
+    """
+    Fill one template with a chunk of records inside a pool worker.
+
+    Args:
+        job: Tuple of (names, pdf_bytes, anchors, canvas_width, canvas_height, preview,
+             plan_key, save_options, records)
+
+    Returns:
+        List of (name, result_bytes or None, error message or None)
+    """
+    names, pdf_bytes, anchors, canvas_width, canvas_height, preview, plan_key, save_options, records = job
+    try:
+        results = fill_records(pdf_bytes, anchors, canvas_width, canvas_height, records,
+                               preview=preview, plan_key=plan_key, save_options=save_options)
+        return [(name, result, None) for name, result in zip(names, results)]
+    except Exception as e:
+        return [(name, None, str(e)) for name in names]
+
+
+def fill_records_batch(pdf_bytes: bytes, records: list, anchors: list, canvas_width: int,
+                       canvas_height: int, preview: bool = False, plan_key: tuple = None,
+                       max_workers: int = None, save_options: dict = None,
+                       chunk_size: int = RECORD_CHUNK_SIZE):
+    """
+    Fill one template once per record using the process pool.
+
+    Args:
+        pdf_bytes: Template PDF as bytes
+        records: List of value dictionaries
+        chunk_size: Records per pool task
+        (other arguments as for fill_batch)
+
+    Yields:
+        Tuples of (name, result_bytes or None, error message or None), in record order.
+        Names are the 1-based record number, zero padded (e.g. "00001.pdf").
+    """
+    global _executor
+
+    width = max(5, len(str(len(records))))
+    jobs = []
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        names = [f'{start + i + 1:0{width}d}.pdf' for i in range(len(chunk))]
+        jobs.append((names, pdf_bytes, anchors, canvas_width, canvas_height, preview,
+                     plan_key, save_options, chunk))
+
+    try:
+        for results in get_executor(max_workers).map(fill_record_chunk, jobs):
+            yield from results
+    except BrokenProcessPool:
+        _executor = None
+        raise
+
+
+def read_zip_pdfs(zip_file, max_files: int, max_bytes: int) -> list:
+    """
+    Extract PDF entries from an uploaded ZIP archive.
+
+    Limits are checked against the central directory before anything is
+    decompressed. Reads never return more than an entry's declared size,
+    so the declared sizes bound memory use.
+
+    Args:
+        zip_file: Seekable file object with the ZIP archive
+        max_files: Maximum number of PDF entries
+        max_bytes: Maximum total uncompressed size of the PDF entries
+
+    Returns:
+        List of (name, pdf_bytes) tuples
+
+    Raises:
+        ValueError: If the archive exceeds a limit
+        zipfile.BadZipFile: If the archive is invalid
+    """
+    with zipfile.ZipFile(zip_file) as archive:
+        entries = [
+            info for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith('.pdf')
+        ]
+        if len(entries) > max_files:
+            raise ValueError(f'Too many PDF files in ZIP archive (max {max_files})')
+        if sum(info.file_size for info in entries) > max_bytes:
+            raise ValueError(f'ZIP contents too large (max {max_bytes} bytes uncompressed)')
+
+        return [(os.path.basename(info.filename), archive.read(info)) for info in entries]
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable buffer that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_results_zip(results, prefix: str = 'filled_'):
+    """
+    Stream batch results as a ZIP archive, one entry at a time.
+
+    Failed files are listed in an errors.json entry at the end.
+
+    Args:
+        results: Iterable of (name, result_bytes or None, error or None)
+        prefix: Prefix for output filenames
+
+    Yields:
+        ZIP archive chunks
+    """
+    sink = _ChunkSink()
+    errors = []
+    used_names = set()
+
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for name, result, error in results:
+            if error:
+                errors.append({'file': name, 'error': error})
+                continue
+
+            # Keep entry names unique when uploads share a filename
+            base, ext = os.path.splitext(f'{prefix}{name}')
+            entry_name = f'{base}{ext}'
+            counter = 1
+            while entry_name in used_names:
+                entry_name = f'{base}_{counter}{ext}'
+                counter += 1
+            used_names.add(entry_name)
+
+            archive.writestr(entry_name, result)
+            yield sink.drain()
+
+        if errors:
+            archive.writestr('errors.json', json.dumps(errors, indent=2))
+
+    yield sink.drain()
+
+
+# Filled documents appended to the merged output between flushes
+MERGE_FLUSH_DOCS = 25
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+def stream_results_merged(results, flush_docs: int = MERGE_FLUSH_DOCS, folder: str = None):
+    """
+    Stream batch results as one merged PDF, built incrementally on disk.
+
+    Filled documents are appended with insert_pdf and flushed every
+    flush_docs documents as an incremental update, which only appends to
+    the output file. Bytes already written never change, so they are sent
+    to the client as soon as they are flushed, and the merged document is
+    reopened from disk after each flush instead of growing in memory.
+
+    Failed files are skipped and listed on a final summary page.
+
+    Args:
+        results: Iterable of (name, result_bytes or None, error or None)
+        flush_docs: Documents to append between flushes
+        folder: Directory for the temporary output file (default: system temp)
+
+    Yields:
+        PDF chunks
+    """
+    fd, path = tempfile.mkstemp(dir=folder, suffix='.pdf')
+    os.close(fd)
+
+    merged = None
+    pending = 0
+    sent = 0
+    errors = []
+
+    def flush():
+        """Write pending pages and yield the newly appended bytes"""
+        nonlocal merged, pending, sent
+        if merged.page_count == 0:
+            return
+        if sent == 0:
+            merged.save(path)
+        else:
+            merged.save(path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+        merged.close()
+        merged = fitz.open(path)
+        pending = 0
+
+        with open(path, 'rb') as f:
+            f.seek(sent)
+            while True:
+                chunk = f.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                sent += len(chunk)
+                yield chunk
+
+    try:
+        merged = fitz.open()
+
+        for name, result, error in results:
+            if error:
+                errors.append((name, error))
+                continue
+
+            with fitz.open(stream=result, filetype='pdf') as filled:
+                merged.insert_pdf(filled)
+            pending += 1
+
+            if pending >= flush_docs:
+                yield from flush()
+
+        if errors:
+            page = merged.new_page()
+            lines = ['Files that could not be processed:', '']
+            lines += [f'{name}: {error}' for name, error in errors]
+            page.insert_textbox(page.rect + (36, 36, -36, -36), '\n'.join(lines), fontsize=9)
+
+        yield from flush()
+    finally:
+        if merged is not None:
+            merged.close()
+        if os.path.exists(path):
+            os.remove(path)
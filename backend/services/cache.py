@@ -0,0 +1,110 @@
+"""
+Cache helpers - Small thread-safe in-process caches
+"""
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by entry count and/or total size.
+
+    Args:
+        max_entries: Maximum number of entries (None = unbounded)
+        max_bytes: Maximum total size as measured by sizeof (None = unbounded)
+        sizeof: Function returning the size of a value (default: len)
+        on_evict: Called with (key, value) for entries evicted to make room
+                  (outside the lock; not called for pop, remove_where or clear)
+    """
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None, sizeof=len, on_evict=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._on_evict = on_evict
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Get a value and mark it most recently used"""
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def set(self, key, value):
+        """Store a value, evicting least recently used entries as needed"""
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+            # Values larger than the whole cache are not stored
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self._data[key] = value
+            self._sizes[key] = size
+            self._total_bytes += size
+
+            evicted = []
+            while self._over_limit():
+                oldest = next(iter(self._data))
+                if self._on_evict is not None:
+                    evicted.append((oldest, self._data[oldest]))
+                self._remove(oldest)
+
+        for evicted_key, evicted_value in evicted:
+            self._on_evict(evicted_key, evicted_value)
+
+    def pop(self, key, default=None):
+        """Remove and return a value"""
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data[key]
+            self._remove(key)
+            return value
+
+    def remove_where(self, predicate) -> int:
+        """Remove all entries whose key matches predicate. Returns count removed."""
+        with self._lock:
+            keys = [k for k in self._data if predicate(k)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def _remove(self, key):
+        del self._data[key]
+        self._total_bytes -= self._sizes.pop(key)
+
+    def _over_limit(self) -> bool:
+        if self.max_entries is not None and len(self._data) > self.max_entries:
+            return True
+        if self.max_bytes is not None and self._total_bytes > self.max_bytes:
+            return True
+        return False
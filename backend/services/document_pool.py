@@ -0,0 +1,137 @@
+"""
+Document Pool - Keep stored template PDFs open between requests
+Opening a fitz.Document parses the xref table; keeping documents open
+per worker process skips that on every page render. Documents are opened
+by path, so MuPDF reads pages from disk on demand instead of copying bytes.
+"""
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import fitz  # PyMuPDF
+
+from .metrics import metrics
+
+
+class _PooledDocument:
+    __slots__ = ('doc', 'lock', 'size')
+
+    def __init__(self, doc, size):
+        self.doc = doc
+        self.lock = threading.Lock()  # fitz.Document is not thread-safe
+        self.size = size
+
+
+class DocumentPool:
+    """LRU pool of open fitz.Document objects keyed by content hash"""
+
+    def __init__(self, app=None, max_docs: int = 16, max_bytes: int = 256 * 1024 * 1024):
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Size the pool from app config"""
+        self.max_docs = app.config['DOC_POOL_MAX_DOCS']
+        self.max_bytes = app.config['DOC_POOL_MAX_BYTES']
+        app.extensions['document_pool'] = self
+
+    @contextmanager
+    def open(self, content_hash: str, file_path: str):
+        """
+        Borrow an open document for exclusive use.
+
+        Usage:
+            with document_pool.open(pdf.content_hash, pdf.file_path) as doc:
+                page = doc[0]
+
+        Args:
+            content_hash: Content hash of the stored file (pool key)
+            file_path: Path used to open the file on a miss
+
+        Yields:
+            fitz.Document (do not close it, keep references after the block,
+            or borrow another document inside the block)
+        """
+        entry = self._get_or_open(content_hash, file_path)
+        with entry.lock:
+            if entry.doc.is_closed:
+                # Evicted while we waited; fall back to a private copy
+                doc = fitz.open(file_path)
+                try:
+                    yield doc
+                finally:
+                    doc.close()
+            else:
+                yield entry.doc
+
+    def invalidate(self, content_hash: str):
+        """Close and drop a document (e.g. after its file is deleted)"""
+        with self._lock:
+            entry = self._entries.pop(content_hash, None)
+            if entry:
+                self._total_bytes -= entry.size
+        if entry:
+            self._close(entry)
+
+    def clear(self):
+        """Close every pooled document"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._total_bytes = 0
+        for entry in entries:
+            self._close(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get_or_open(self, content_hash: str, file_path: str) -> _PooledDocument:
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry is not None:
+                self._entries.move_to_end(content_hash)
+                return entry
+
+        # Open outside the pool lock so a slow parse doesn't block other documents
+        with metrics.span('fitz_open'):
+            doc = fitz.open(file_path)
+        new_entry = _PooledDocument(doc, os.path.getsize(file_path))
+
+        evicted = []
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry is None:
+                entry = new_entry
+                self._entries[content_hash] = entry
+                self._total_bytes += entry.size
+                # Evict least recently used, but never the entry just added
+                while len(self._entries) > 1 and (
+                    len(self._entries) > self.max_docs or self._total_bytes > self.max_bytes
+                ):
+                    _, old = self._entries.popitem(last=False)
+                    self._total_bytes -= old.size
+                    evicted.append(old)
+
+        if entry is not new_entry:
+            # Another thread opened it first
+            doc.close()
+        for old in evicted:
+            self._close(old)
+
+        return entry
+
+    @staticmethod
+    def _close(entry: _PooledDocument):
+        # Wait for any borrower to finish before closing
+        with entry.lock:
+            if not entry.doc.is_closed:
+                entry.doc.close()
+
+
+document_pool = DocumentPool()
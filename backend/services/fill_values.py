@@ -0,0 +1,90 @@
+"""
+Fill Values - Per-request data for anchor placeholders
+An anchor whose text is a placeholder such as "{{signature}}" is filled with
+the value for key "signature". Anchors with literal text are stamped as-is.
+"""
+import csv
+import io
+import json
+import re
+
+_PLACEHOLDER = re.compile(r'^\s*\{\{\s*([^{}]+?)\s*\}\}\s*$')
+
+
+def anchor_key(text: str):
+    """Key of a placeholder anchor ("{{name}}" -> "name"), or None for literal text"""
+    match = _PLACEHOLDER.match(text or '')
+    return match.group(1) if match else None
+
+
+def resolve_text(text: str, key, values: dict) -> str:
+    """
+    Text to stamp for one anchor.
+
+    Args:
+        text: Anchor text
+        key: anchor_key(text)
+        values: Record mapping keys to strings, or None to stamp anchor text
+
+    Returns:
+        Text to insert ('' when the record has no value for the placeholder)
+    """
+    if values is None or key is None:
+        return text
+    value = values.get(key)
+    return '' if value is None else str(value)
+
+
+def parse_values(values_json: str) -> dict:
+    """
+    Parse a single record from a JSON object string.
+
+    Raises:
+        ValueError: If the JSON is invalid or not an object
+    """
+    try:
+        values = json.loads(values_json)
+    except json.JSONDecodeError:
+        raise ValueError('Invalid values JSON')
+    if not isinstance(values, dict):
+        raise ValueError('values must be a JSON object')
+    return values
+
+
+def read_records(data: bytes, filename: str = '') -> list:
+    """
+    Parse many records from an uploaded file.
+
+    Supported formats (by extension, falling back to content sniffing):
+        .csv   - Header row of keys, one record per row
+        .jsonl - One JSON object per line
+        .json  - JSON array of objects
+
+    Raises:
+        ValueError: If the file cannot be parsed
+
+    Returns:
+        List of dictionaries
+    """
+    try:
+        text = data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ValueError('Records file must be UTF-8')
+
+    name = filename.lower()
+    stripped = text.lstrip()
+
+    if name.endswith('.csv') or not (name.endswith(('.json', '.jsonl')) or stripped[:1] in ('[', '{')):
+        return [dict(row) for row in csv.DictReader(io.StringIO(text))]
+
+    try:
+        if stripped.startswith('['):
+            records = json.loads(text)
+        else:
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    except json.JSONDecodeError as e:
+        raise ValueError(f'Invalid records JSON: {e}')
+
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise ValueError('Records must be JSON objects')
+    return records
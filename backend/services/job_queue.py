@@ -0,0 +1,321 @@
+"""
+Job Queue - Local background queue for auto-fill jobs
+No external broker: job records live in the app database, inputs and
+results are spooled to disk, and a small thread pool per worker process
+claims queued jobs and hands the PDF work to the batch process pool.
+
+Workers are started explicitly by the serving entry points (gunicorn worker
+boot, ASGI lifespan startup, the dev server), never just by building the app,
+so scripts and benchmarks don't spawn polling threads. Jobs queued before a
+restart are picked up without a new submission. Periodic maintenance fails jobs left running by a worker that
+died and purges finished jobs after JOB_RETENTION seconds.
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from datetime import datetime, timedelta
+
+from database import db
+from models import Job
+from .batch_service import get_executor, fill_one
+
+
+class QueueFullError(Exception):
+    """Raised when too many jobs are pending (backpressure)"""
+    pass
+
+
+# Seconds between maintenance passes (stale job reclaim, retention purge) per process
+MAINTENANCE_INTERVAL = 60
+
+# Expired jobs removed per maintenance pass
+PURGE_BATCH_SIZE = 500
+
+
+class JobQueue:
+    """Database-backed job queue with a bounded worker pool"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self._threads = []
+        self._started_pid = None
+        self._next_maintenance = 0.0
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Bind queue to a Flask app (call start() in each serving process to run jobs)"""
+        self.app = app
+        app.config['JOB_FOLDER'] = app.config.get('JOB_FOLDER') or os.path.join(app.config['UPLOAD_FOLDER'], 'jobs')
+        app.extensions['job_queue'] = self
+
+    # ============ CONFIG ============
+
+    @property
+    def job_folder(self) -> str:
+        return self.app.config['JOB_FOLDER']
+
+    @property
+    def num_workers(self) -> int:
+        return self.app.config['JOB_WORKERS']
+
+    @property
+    def max_pending(self) -> int:
+        return self.app.config['JOB_QUEUE_MAX']
+
+    @property
+    def poll_interval(self) -> float:
+        return self.app.config['JOB_POLL_INTERVAL']
+
+    @property
+    def running_timeout(self) -> int:
+        return self.app.config['JOB_RUNNING_TIMEOUT']
+
+    @property
+    def retention(self) -> int:
+        return self.app.config['JOB_RETENTION']
+
+    # ============ SUBMIT ============
+
+    def submit(self, pdf_bytes: bytes, anchors: list, canvas_width: int, canvas_height: int,
+               preview: bool = False, pdf_id: int = None, plan_key: tuple = None,
+               values: dict = None) -> Job:
+        """
+        Spool input to disk and enqueue an auto-fill job.
+
+        Must be called inside an app context.
+
+        Raises:
+            QueueFullError: If JOB_QUEUE_MAX jobs are already queued or running
+
+        Returns:
+            The new Job record
+        """
+        self.maintain()  # Jobs orphaned by a dead worker must not count as pending
+        pending = Job.query.filter(Job.status.in_([Job.QUEUED, Job.RUNNING])).count()
+        if pending >= self.max_pending:
+            raise QueueFullError(f'Job queue is full ({pending} pending jobs)')
+
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.job_folder, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+
+        input_path = os.path.join(job_dir, 'input.pdf')
+        with open(input_path, 'wb') as f:
+            f.write(pdf_bytes)
+
+        job = Job(
+            id=job_id,
+            kind='autofill',
+            status=Job.QUEUED,
+            progress=0,
+            pdf_id=pdf_id,
+            params=json.dumps({
+                'anchors': anchors,
+                'canvasWidth': canvas_width,
+                'canvasHeight': canvas_height,
+                'preview': preview,
+                'planKey': plan_key,
+                'values': values
+            }),
+            input_path=input_path
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        self.start()
+        self._wakeup.set()
+
+        return job
+
+    def queue_position(self, job: Job) -> int:
+        """Number of queued jobs ahead of this one (0 = next)"""
+        if job.status != Job.QUEUED:
+            return 0
+        return Job.query.filter(
+            Job.status == Job.QUEUED,
+            Job.created_at < job.created_at
+        ).count()
+
+    def delete(self, job: Job):
+        """Remove a finished job's record and its files"""
+        shutil.rmtree(os.path.join(self.job_folder, job.id), ignore_errors=True)
+        db.session.delete(job)
+        db.session.commit()
+
+    # ============ MAINTENANCE ============
+
+    def maintain(self):
+        """
+        Fail stale running jobs and purge expired finished jobs, at most
+        once per MAINTENANCE_INTERVAL in this process. Must be called inside
+        an app context.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_maintenance:
+                return
+            self._next_maintenance = now + MAINTENANCE_INTERVAL
+
+        self.reclaim_stale()
+        self.purge_expired()
+
+    def reclaim_stale(self) -> int:
+        """
+        Fail jobs running for longer than JOB_RUNNING_TIMEOUT (their worker
+        was killed or restarted mid-job; they would otherwise stay pending
+        forever and count against JOB_QUEUE_MAX).
+
+        Returns:
+            Number of jobs failed
+        """
+        now = datetime.utcnow()
+        failed = Job.query.filter(
+            Job.status == Job.RUNNING,
+            Job.started_at < now - timedelta(seconds=self.running_timeout)
+        ).update({
+            'status': Job.FAILED,
+            'error': 'Job did not finish (worker stopped or timed out)',
+            'finished_at': now
+        }, synchronize_session=False)
+        db.session.commit()
+        return failed
+
+    def purge_expired(self) -> int:
+        """
+        Delete finished jobs older than JOB_RETENTION, with their files.
+
+        Returns:
+            Number of jobs deleted
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention)
+        job_ids = [job_id for job_id, in db.session.query(Job.id).filter(
+            Job.status.in_([Job.DONE, Job.FAILED]),
+            Job.finished_at < cutoff
+        ).limit(PURGE_BATCH_SIZE)]
+        if not job_ids:
+            return 0
+
+        for job_id in job_ids:
+            shutil.rmtree(os.path.join(self.job_folder, job_id), ignore_errors=True)
+        Job.query.filter(Job.id.in_(job_ids)).delete(synchronize_session=False)
+        db.session.commit()
+        return len(job_ids)
+
+    # ============ WORKERS ============
+
+    def start(self):
+        """Start worker threads once per process (after a fork, in the child)"""
+        if self._started_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            self._started_pid = os.getpid()
+            self._threads = []  # Threads of a parent process don't survive fork
+            while len(self._threads) < self.num_workers:
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    name=f'job-worker-{len(self._threads)}',
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def shutdown(self):
+        """Stop worker threads (finishing the current job)"""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._started_pid = None
+        self._stop.clear()
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            job_id = None
+            with self.app.app_context():
+                try:
+                    self.maintain()
+                    job_id = self._claim_next()
+                    if job_id:
+                        self._run(job_id)
+                except Exception:
+                    # Keep the worker alive across transient DB errors
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+            if not job_id:
+                # Sleep until a local submit wakes us, or poll for jobs from other processes
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _claim_next(self):
+        """Atomically move the oldest queued job to running. Returns job id or None."""
+        candidate = Job.query.filter_by(status=Job.QUEUED).order_by(Job.created_at).first()
+        if candidate is None:
+            return None
+
+        # Conditional update so only one worker (in any process) wins the job
+        claimed = Job.query.filter_by(id=candidate.id, status=Job.QUEUED).update({
+            'status': Job.RUNNING,
+            'progress': 10,
+            'started_at': datetime.utcnow()
+        })
+        db.session.commit()
+
+        return candidate.id if claimed == 1 else None
+
+    def _run(self, job_id: str):
+        job = db.session.get(Job, job_id)
+        params = json.loads(job.params)
+        preview = params.get('preview', False)
+
+        try:
+            with open(job.input_path, 'rb') as f:
+                pdf_bytes = f.read()
+
+            # CPU-bound PyMuPDF work goes to the shared process pool
+            future = get_executor(self.app.config['AUTOFILL_WORKERS']).submit(fill_one, (
+                job_id,
+                pdf_bytes,
+                params['anchors'],
+                params['canvasWidth'],
+                params['canvasHeight'],
+                preview,
+                tuple(params['planKey']) if params.get('planKey') else None,
+                self.app.config['JOB_SAVE_OPTIONS'],
+                params.get('values')
+            ))
+            _, result, error = future.result()
+            if error:
+                raise RuntimeError(error)
+
+            result_path = os.path.join(self.job_folder, job_id, 'result.pdf')
+            with open(result_path, 'wb') as f:
+                f.write(result)
+
+            job.status = Job.DONE
+            job.progress = 100
+            job.result_path = result_path
+            job.result_filename = 'preview_contract.pdf' if preview else 'filled_contract.pdf'
+        except Exception as e:
+            job.status = Job.FAILED
+            job.error = f'Failed to process PDF: {str(e)}'
+        finally:
+            if job.input_path and os.path.exists(job.input_path):
+                os.remove(job.input_path)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+
+job_queue = JobQueue()
@@ -0,0 +1,287 @@
+"""
+Metrics - Request timing spans, stage histograms and SQL query counts
+Work inside a request is split into stages (database queries, disk reads,
+fitz open, rasterization, saves, ...) timed with span(). Each request's
+stages are summed into a Server-Timing response header, and all requests
+feed Prometheus-format counters and histograms served at /api/metrics.
+
+Metrics are kept per process, like the caches: behind several gunicorn
+workers each scrape reports the worker that answered it. Spans that run in
+the batch process pool are not visible to the web worker.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Latency buckets in seconds (Prometheus client defaults plus slow PDF work)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {value}')
+        return lines
+
+
+class Gauge:
+    """Value that is set rather than accumulated, with labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} gauge']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {round(value, 6)}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                label_text = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f'{self.name}_bucket{label_text} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{label_text} {series[-1]}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {round(series[-2], 6)}')
+            lines.append(f'{self.name}_count{label_text} {series[-1]}')
+        return lines
+
+
+class _RequestTimings:
+    """Per-request accumulator kept on flask.g"""
+    __slots__ = ('start', 'stages', 'queries', 'handled')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}  # stage -> [seconds, count]
+        self.queries = 0
+        self.handled = None  # perf_counter when the view returned
+
+    def add(self, stage: str, seconds: float):
+        entry = self.stages.get(stage)
+        if entry is None:
+            self.stages[stage] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+
+class Metrics:
+    """Process-wide metrics registry and Flask request instrumentation"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = True
+        self.server_timing = False
+        self.requests = Counter(
+            'pdf_anchor_http_requests_total', 'HTTP requests handled',
+            ('method', 'endpoint', 'status'))
+        self.request_duration = Histogram(
+            'pdf_anchor_http_request_duration_seconds',
+            'Time from request start until the response body was sent',
+            ('method', 'endpoint'))
+        self.stage_duration = Histogram(
+            'pdf_anchor_stage_duration_seconds',
+            'Time spent per stage (db, disk_read, fitz_open, rasterize, save, send, ...)',
+            ('stage',))
+        self.request_queries = Histogram(
+            'pdf_anchor_db_queries_per_request', 'SQL statements executed per request',
+            ('endpoint',), buckets=QUERY_COUNT_BUCKETS)
+        self.startup = Gauge(
+            'pdf_anchor_startup_seconds',
+            'Process startup time per phase (imports, create_app, schema, preload, worker_spawn)',
+            ('phase',))
+        self._metrics = (self.requests, self.request_duration, self.stage_duration, self.request_queries,
+                         self.startup)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Install request hooks and SQL listeners (METRICS_ENABLED, SERVER_TIMING)"""
+        self.app = app
+        self.enabled = app.config['METRICS_ENABLED']
+        self.server_timing = app.config['SERVER_TIMING']
+        app.extensions['metrics'] = self
+
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    # ============ RECORDING ============
+
+    @contextmanager
+    def span(self, stage: str):
+        """
+        Time a stage of work.
+
+        Usage:
+            with metrics.span('rasterize'):
+                pix = page.get_pixmap(...)
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float):
+        """Add a timed stage to the histograms and to the current request"""
+        self.stage_duration.observe(seconds, stage)
+        if has_request_context():
+            timings = g.get('_request_timings')
+            if timings is not None:
+                timings.add(stage, seconds)
+
+    # ============ REQUEST HOOKS ============
+
+    def _before_request(self):
+        g._request_timings = _RequestTimings()
+
+    def _after_request(self, response):
+        timings = g.get('_request_timings')
+        if timings is None:
+            return response
+
+        timings.handled = time.perf_counter()
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        method = request.method
+
+        self.requests.inc(method, endpoint, str(response.status_code))
+        self.request_queries.observe(timings.queries, endpoint)
+
+        if self.server_timing:
+            response.headers['Server-Timing'] = self._server_timing_header(timings)
+
+        # Streamed bodies are produced after this hook; time them on close
+        def on_close():
+            closed = time.perf_counter()
+            self.stage_duration.observe(closed - timings.handled, 'send')
+            self.request_duration.observe(closed - timings.start, method, endpoint)
+
+        response.call_on_close(on_close)
+        return response
+
+    @staticmethod
+    def _server_timing_header(timings: _RequestTimings) -> str:
+        parts = []
+        for stage, (seconds, count) in timings.stages.items():
+            if stage == 'db':
+                desc = f';desc="{count} {"query" if count == 1 else "queries"}"'
+            else:
+                desc = f';desc="x{count}"' if count > 1 else ''
+            parts.append(f'{stage};dur={seconds * 1000:.2f}{desc}')
+        parts.append(f'app;dur={(timings.handled - timings.start) * 1000:.2f}')
+        return ', '.join(parts)
+
+    # ============ EXPOSITION ============
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+# ============ SQL QUERY TIMING ============
+# Listeners on the Engine class see every engine (and every connection),
+# so no per-engine setup is needed when engines are created later.
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    metrics.record('db', elapsed)
+    if has_request_context():
+        timings = g.get('_request_timings')
+        if timings is not None:
+            timings.queries += 1
@@ -0,0 +1,171 @@
+"""
+Page Image Cache - Two-tier cache for rendered PDF pages
+Tier 1: in-memory LRU bounded by bytes. Tier 2: files under PAGE_CACHE_FOLDER.
+Keys are content-addressed (content hash, page, size, format), so entries never go stale.
+
+Upload prerendering has its own small process pool (PAGE_PRERENDER_WORKERS)
+and a cap on pending renders (PAGE_PRERENDER_QUEUE_MAX), so it never queues
+ahead of auto-fill work on the batch pool. Results are written to disk by
+one writer thread.
+"""
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .batch_service import new_process_pool
+from .cache import LRUCache
+from .metrics import metrics
+from .pdf_service import render_file_pages
+
+
+class PageImageCache:
+    """Memory + disk cache of rendered page images"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self._memory = LRUCache(max_bytes=0)
+        self._prerender_pool = None
+        self._writer = None
+        self._pending = 0  # Prerender tasks submitted and not yet stored
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Bind cache to a Flask app and size the memory tier from config"""
+        self.app = app
+        app.config['PAGE_CACHE_FOLDER'] = (app.config.get('PAGE_CACHE_FOLDER')
+                                           or os.path.join(app.config['UPLOAD_FOLDER'], 'cache', 'pages'))
+        self._memory = LRUCache(max_bytes=app.config['PAGE_CACHE_MAX_BYTES'])
+        app.extensions['page_cache'] = self
+
+    @property
+    def folder(self) -> str:
+        return self.app.config['PAGE_CACHE_FOLDER']
+
+    @staticmethod
+    def make_key(content_hash: str, page_num: int, dpi: int = 150, width: int = None,
+                 fmt: str = 'png') -> tuple:
+        """Cache key for a page rendered at a DPI, or at a fixed pixel width"""
+        size = f'w{width}' if width else f'd{dpi}'
+        return (content_hash, page_num, size, fmt)
+
+    @staticmethod
+    def etag(key: tuple) -> str:
+        """Strong ETag for a cache key (content never changes for a key)"""
+        content_hash, page_num, size, fmt = key
+        return f'{content_hash[:32]}-p{page_num}-{size}-{fmt}'
+
+    def _path(self, key: tuple) -> str:
+        content_hash, page_num, size, fmt = key
+        return os.path.join(self.folder, content_hash[:2], content_hash, f'{page_num}_{size}.{fmt}')
+
+    def get(self, key: tuple):
+        """Get image bytes from memory, then disk (promoting to memory). None on miss."""
+        data = self._memory.get(key)
+        if data is not None:
+            return data
+
+        path = self._path(key)
+        try:
+            with metrics.span('disk_read'), open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        self._memory.set(key, data)
+        return data
+
+    def set(self, key: tuple, data: bytes, memory: bool = True):
+        """Store image bytes on disk, and in memory unless memory=False"""
+        if memory:
+            self._memory.set(key, data)
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temp file then rename, so readers never see partial images
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with metrics.span('disk_write'), os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get_or_render(self, key: tuple, render):
+        """
+        Get image bytes, calling render() and caching the result on a miss.
+
+        Args:
+            key: Cache key from make_key()
+            render: Zero-argument function returning image bytes
+
+        Returns:
+            Image bytes
+        """
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.set(key, data)
+        return data
+
+    def prerender(self, content_hash: str, file_path: str, total_pages: int, specs: list):
+        """
+        Render pages in the background and store them in the disk tier.
+
+        Work runs on the prerender process pool (one task per spec, document
+        opened once per task) and the writer thread stores the results, so
+        this returns immediately. Specs beyond PAGE_PRERENDER_QUEUE_MAX
+        pending tasks are skipped; those pages render on demand. Prerendered
+        pages skip the memory tier to avoid evicting pages users are
+        actively viewing.
+
+        Args:
+            content_hash: Content hash of the stored file
+            file_path: Path to the stored file
+            total_pages: Number of pages to render
+            specs: List of {'dpi': int, 'width': int, 'fmt': str} dictionaries
+        """
+        for spec in specs:
+            dpi, width, fmt = spec.get('dpi', 150), spec.get('width'), spec.get('fmt', 'png')
+
+            page_nums = [
+                page_num for page_num in range(1, total_pages + 1)
+                if not os.path.exists(self._path(self.make_key(content_hash, page_num, dpi, width, fmt)))
+            ]
+            if not page_nums:
+                continue
+
+            with self._lock:
+                if self._pending >= self.app.config['PAGE_PRERENDER_QUEUE_MAX']:
+                    return  # Busy: pages will simply render on demand
+                self._pending += 1
+                if self._prerender_pool is None:
+                    self._prerender_pool = new_process_pool(self.app.config['PAGE_PRERENDER_WORKERS'])
+                    self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prerender-write')
+
+            future = self._prerender_pool.submit(render_file_pages, file_path, page_nums, dpi, width, fmt)
+            self._writer.submit(self._store_prerendered, future, content_hash, dpi, width, fmt)
+
+    def _store_prerendered(self, future, content_hash: str, dpi: int, width: int, fmt: str):
+        """Wait for a prerender task and write its pages to the disk tier (writer thread)"""
+        try:
+            for page_num, data in future.result():
+                self.set(self.make_key(content_hash, page_num, dpi, width, fmt), data, memory=False)
+        except Exception:
+            pass  # Pages will simply render on demand
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def purge(self, content_hash: str):
+        """Remove every cached page for a document"""
+        self._memory.remove_where(lambda key: key[0] == content_hash)
+        shutil.rmtree(os.path.join(self.folder, content_hash[:2], content_hash), ignore_errors=True)
+
+
+page_cache = PageImageCache()
@@ -3,9 +3,21 @@ PDF Service - Core PDF manipulation logic using PyMuPDF
 """
 import fitz  # PyMuPDF
 import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
 
+from .cache import LRUCache
+from .fill_values import anchor_key, resolve_text
+from .metrics import metrics
+from .text_layout import FONTS, anchor_style, layout_text, text_width
 
-def place_anchors_on_pdf(pdf_bytes: bytes, anchors: list, canvas_width: int, canvas_height: int, preview: bool = False) -> bytes:
+
+def place_anchors_on_pdf(pdf_bytes: bytes, anchors: list, canvas_width: int, canvas_height: int,
+                         preview: bool = False, plan_key: tuple = None, save_options: dict = None,
+                         values: dict = None) -> bytes:
     """
     Place anchor text on PDF at specified coordinates.
     
@@ -15,49 +27,291 @@ def place_anchors_on_pdf(pdf_bytes: bytes, anchors: list, canvas_width: int, can
         canvas_width: Width of canvas when anchors were placed
         canvas_height: Height of canvas when anchors were placed
         preview: If True, use red text for visibility. If False, use white text for clean output.
+        plan_key: Stable identity of the anchor set, e.g. (pdf_id, anchor_revision).
+                  If omitted, the anchors themselves are hashed.
+        save_options: Output options {'incremental': bool, 'garbage': 0-4, 'deflate': bool}.
+                      incremental appends the new text as a revision after the original
+                      bytes instead of rewriting the whole document.
+        values: Record mapping placeholder keys to strings ("{{name}}" -> values['name']).
+                Filled values are drawn in black (red in preview).
     
     Returns:
         Modified PDF as bytes
     """
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    total_pages = len(doc)
+    results = fill_records(pdf_bytes, anchors, canvas_width, canvas_height, [values],
+                           preview, plan_key, save_options)
+    try:
+        return next(results)
+    finally:
+        results.close()
+
+
+def fill_records(pdf_bytes: bytes, anchors: list, canvas_width: int, canvas_height: int,
+                 records: list, preview: bool = False, plan_key: tuple = None,
+                 save_options: dict = None):
+    """
+    Fill one template with many records, one output document per record.
     
-    # Color: Red for preview (visible), White for final (clean/invisible)
-    text_color = (1, 0, 0) if preview else (1, 1, 1)  # RGB: Red or White
+    The template is parsed once: its pages give the placement plan, and the
+    parsed document itself produces the last record. Earlier records need
+    their own copy (MuPDF cannot undo insertions cleanly), opened from the
+    template bytes. That only reads the xref, and only the pages the plan
+    writes to are loaded. Damaged templates are repaired once and the
+    repaired bytes are reused, so no record repeats the repair.
     
-    for anchor in anchors:
-        pages = determine_pages(anchor.get('page', '1'), total_pages)
+    Args:
+        records: List of value dictionaries (None entries stamp the anchor text)
+        (other arguments as for place_anchors_on_pdf)
+    
+    Yields:
+        Filled PDF bytes, in record order
+    """
+    save_options = save_options or {}
+    
+    if save_options.get('incremental'):
+        yield from _fill_records_incremental(pdf_bytes, anchors, canvas_width, canvas_height,
+                                             records, preview, plan_key, save_options)
+        return
+    
+    def save(doc):
+        with metrics.span('save'):
+            return doc.tobytes(
+                garbage=save_options.get('garbage', 0),
+                deflate=save_options.get('deflate', False)
+            )
+    
+    with metrics.span('fitz_open'):
+        template = fitz.open(stream=pdf_bytes, filetype="pdf")
+    with template:
+        plan = _page_plan(template, anchors, canvas_width, canvas_height, preview, plan_key)
+        if template.is_repaired and len(records) > 1:
+            pdf_bytes = save(template)  # Repair once; copies open the repaired bytes
         
-        for page_num in pages:
-            if page_num < 1 or page_num > total_pages:
-                continue
-                
-            page = doc[page_num - 1]  # 0-indexed
+        for values in records[:-1]:
+            with metrics.span('fitz_open'):
+                doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+            with doc:
+                _fill_planned_pages(doc, plan, preview, values)
+                filled = save(doc)
+            yield filled
+        
+        if records:
+            _fill_planned_pages(template, plan, preview, records[-1])
+            yield save(template)
+
+
+def _fill_records_incremental(pdf_bytes, anchors, canvas_width, canvas_height,
+                              records, preview, plan_key, save_options):
+    """Fill records saving each as an incremental update (MuPDF needs a real file for this)"""
+    fd, template_path = tempfile.mkstemp(suffix='.pdf')
+    work_path = f'{template_path}.out'
+    deflate = save_options.get('deflate', False)
+    
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf_bytes)
+        
+        # Parse the template once for the plan; it is filled last, in place
+        with metrics.span('fitz_open'):
+            template = fitz.open(template_path)
+        with template:
+            plan = _page_plan(template, anchors, canvas_width, canvas_height, preview, plan_key)
             
-            # Get anchor canvas dimensions (use provided or from anchor itself)
-            anchor_canvas_width = anchor.get('canvasWidth') or canvas_width
-            anchor_canvas_height = anchor.get('canvasHeight') or canvas_height
+            if not template.can_save_incrementally():
+                # Damaged (repaired) files must be rewritten in full: repair once, not per record
+                yield from fill_records(template.tobytes(), anchors, canvas_width, canvas_height,
+                                        records, preview, plan_key, {'deflate': deflate})
+                return
             
-            # Convert coordinates from canvas to PDF coordinate system
-            pdf_x, pdf_y = convert_coordinates(
-                anchor.get('x', 0),
-                anchor.get('y', 0),
-                anchor_canvas_width,
-                anchor_canvas_height,
-                page.rect.width,
-                page.rect.height
-            )
-            
-            # Insert text at calculated position
+            for index, values in enumerate(records):
+                if index == len(records) - 1:
+                    doc, path = template, template_path
+                else:
+                    shutil.copyfile(template_path, work_path)
+                    path = work_path
+                    with metrics.span('fitz_open'):
+                        doc = fitz.open(path)
+                
+                try:
+                    _fill_planned_pages(doc, plan, preview, values)
+                    with metrics.span('save'):
+                        doc.save(path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP, deflate=deflate)
+                finally:
+                    if doc is not template:
+                        doc.close()
+                
+                with metrics.span('disk_read'), open(path, 'rb') as f:
+                    filled = f.read()
+                yield filled
+    finally:
+        for path in (template_path, work_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _page_plan(doc, anchors, canvas_width, canvas_height, preview, plan_key) -> list:
+    """Placement plan for a parsed template's page geometry"""
+    with metrics.span('fill'):
+        geometry = tuple(displayed_geometry(page) for page in doc)
+        return get_placement_plan(anchors, canvas_width, canvas_height, geometry, preview, plan_key)
+
+
+def _fill_planned_pages(doc, plan, preview, values=None):
+    """Load only the pages a plan writes to and insert its text"""
+    with metrics.span('fill'):
+        pages = {page_index: doc[page_index] for page_index in {item[0] for item in plan}}
+        _insert_plan(pages, plan, preview, values)
+
+
+# Color of filled-in values in final output (anchor text itself stays white)
+FILLED_TEXT_COLOR = (0, 0, 0)
+
+
+def _insert_plan(pages, plan, preview, values=None):
+    """Insert a plan's text into loaded pages, substituting record values"""
+    for page_index, pdf_x, pdf_y, text, color, key, style in plan:
+        if values is not None and key is not None:
+            text = resolve_text(text, key, values)
+            if not text:
+                continue
+            if not preview:
+                color = FILLED_TEXT_COLOR
+        
+        font, font_size, align, max_width, auto_shrink = style
+        font_size, lines = layout_text(text, font, font_size, align, max_width, auto_shrink)
+        
+        # Lines are laid out upright on the displayed page; turn offsets and
+        # glyphs with the page so text reads upright on rotated pages too
+        page = pages[page_index]
+        rotation = page.rotation
+        a, b, c, d = _ROTATED_AXES[rotation]
+        
+        for dx, dy, line in lines:
             page.insert_text(
-                (pdf_x, pdf_y),
-                anchor.get('text', ''),
-                fontsize=10,
-                color=text_color
+                (pdf_x + dx * a + dy * c, pdf_y + dx * b + dy * d),
+                line,
+                fontsize=font_size,
+                fontname=FONTS[font],
+                color=color,
+                rotate=rotation
             )
+
+
+# ============ PLACEMENT PLANS ============
+# A plan is the flat list of (page_index, x, y, text, color, key, style)
+# insertions for one anchor set on one page geometry (key is the placeholder
+# key, or None for literal text; style is (font, size, align, max_width in
+# points, auto_shrink)). Plans are cached per process so the fill hot path is a loop of
+# insert_text calls, shared by every record filled from the same template.
+#
+# Page geometry is a tuple of (width, height, rotation) per page: the page
+# as displayed (CropBox size after /Rotate), which is what the editor canvas
+# shows. Plan x/y are in PyMuPDF page space (unrotated, origin at the CropBox
+# top-left), ready for insert_text.
+
+PLAN_CACHE_SIZE = 256
+
+_plan_cache = LRUCache(max_entries=PLAN_CACHE_SIZE)
+
+
+def compile_placement_plan(anchors: list, canvas_width: int, canvas_height: int,
+                           page_geometry: tuple, preview: bool = False) -> list:
+    """
+    Resolve anchors into concrete text insertions for a page geometry.
+    
+    Args:
+        anchors: List of anchor dictionaries with text, x, y, page and optional
+                 font, fontSize, align, maxWidth, autoShrink
+        canvas_width: Default canvas width when anchors were placed
+        canvas_height: Default canvas height when anchors were placed
+        page_geometry: Tuple of (width, height, rotation) per page, in points
+        preview: If True, use red text. If False, use white text.
+    
+    Raises:
+        ValueError: If an anchor has invalid style settings
+    
+    Returns:
+        List of (page_index, pdf_x, pdf_y, text, color, key, style) tuples, ordered by page
+    """
+    total_pages = len(page_geometry)
+    
+    # Color: Red for preview (visible), White for final (clean/invisible)
+    text_color = (1, 0, 0) if preview else (1, 1, 1)  # RGB: Red or White
+    
+    points = []  # (canvas_x, canvas_y, canvas_width, canvas_height, page_indexes) per anchor
+    placements = []  # (text, key, style fields), parallel to points
+    for anchor in anchors:
+        pages = determine_pages(anchor.get('page', '1'), total_pages)
+        
+        # Get anchor canvas dimensions (use provided or from anchor itself)
+        anchor_canvas_width = anchor.get('canvasWidth') or canvas_width
+        anchor_canvas_height = anchor.get('canvasHeight') or canvas_height
+        
+        text = anchor.get('text', '')
+        key = anchor_key(text)
+        style = anchor_style(anchor)
+        
+        page_indexes = [page_num - 1 for page_num in pages if 1 <= page_num <= total_pages]
+        points.append((anchor.get('x', 0), anchor.get('y', 0),
+                       anchor_canvas_width, anchor_canvas_height, page_indexes))
+        placements.append((text, key, style))
+    
+    # Convert every anchor on every target page in one batch
+    plan = []
+    for point, point_coordinates, (text, key, style) in zip(
+            points, convert_coordinates_batch(points, page_geometry), placements):
+        anchor_canvas_width, page_indexes = point[2], point[4]
+        font, font_size, align, max_width, auto_shrink = style
+        
+        # maxWidth is in canvas units, like x and y
+        page_style = (font, font_size, align, None, auto_shrink)
+        for page_index, (pdf_x, pdf_y) in zip(page_indexes, point_coordinates):
+            if max_width and anchor_canvas_width:
+                max_width_pts = max_width * page_geometry[page_index][0] / anchor_canvas_width
+                page_style = (font, font_size, align, max_width_pts, auto_shrink)
+            plan.append((page_index, pdf_x, pdf_y, text, text_color, key, page_style))
+    
+    # Stable sort keeps anchor order within a page
+    plan.sort(key=lambda item: item[0])
+    return plan
+
+
+def get_placement_plan(anchors: list, canvas_width: int, canvas_height: int,
+                       page_geometry: tuple, preview: bool = False, plan_key: tuple = None) -> list:
+    """
+    Get a compiled placement plan from the cache, compiling it on a miss.
+    
+    Args:
+        plan_key: Stable identity of the anchor set (e.g. (pdf_id, anchor_revision)).
+                  If None, a hash of the anchors is used.
+    
+    Returns:
+        List of (page_index, pdf_x, pdf_y, text, color, key, style) tuples
+    """
+    if plan_key is None:
+        anchors_json = json.dumps(anchors, sort_keys=True, default=str)
+        plan_key = ('anchors', hashlib.sha256(anchors_json.encode()).hexdigest())
+    
+    key = (plan_key, canvas_width, canvas_height, preview, page_geometry)
+    
+    plan = _plan_cache.get(key)
+    if plan is None:
+        plan = compile_placement_plan(anchors, canvas_width, canvas_height, page_geometry, preview)
+        _plan_cache.set(key, plan)
+    return plan
+
+
+def invalidate_placement_plans(pdf_id: int) -> int:
+    """
+    Drop cached plans for a saved PDF's anchors (call after anchor changes).
     
-    # Return modified PDF as bytes
-    return doc.tobytes()
+    Keys carry the anchor revision, so stale plans are never served even in
+    other processes; this just frees their memory in the current one.
+    
+    Returns:
+        Number of plans removed
+    """
+    return _plan_cache.remove_where(lambda key: key[0][:2] == ('pdf', pdf_id))
 
 
 def determine_pages(page_setting: str, total_pages: int) -> list:
@@ -97,6 +351,32 @@ def determine_pages(page_setting: str, total_pages: int) -> list:
             return [1]
 
 
+def validate_page_setting(page_setting) -> str:
+    """
+    Check a page setting before it is stored (determine_pages itself falls
+    back to page 1 on anything it can't read).
+    
+    Args:
+        page_setting: "global", "last", comma-separated page numbers, or a page number
+    
+    Raises:
+        ValueError: If the setting is none of these
+    
+    Returns:
+        The setting as stored (string)
+    """
+    if isinstance(page_setting, int) and not isinstance(page_setting, bool) and page_setting >= 1:
+        return str(page_setting)
+    if isinstance(page_setting, str):
+        setting = page_setting.lower().strip()
+        if setting in ('global', 'last'):
+            return page_setting
+        parts = [p.strip() for p in setting.split(',')]
+        if all(p.isdigit() and int(p) >= 1 for p in parts):
+            return page_setting
+    raise ValueError(f'Invalid page setting "{page_setting}" (use "global", "last" or page numbers like "1,3")')
+
+
 def convert_coordinates(canvas_x: int, canvas_y: int, 
                        canvas_width: int, canvas_height: int,
                        pdf_width: float, pdf_height: float) -> tuple:
@@ -132,12 +412,121 @@ def convert_coordinates(canvas_x: int, canvas_y: int,
     return (pdf_x, pdf_y)
 
 
+# Displayed-page axes in PyMuPDF page space per /Rotate, as (a, b, c, d):
+# a displayed offset (dx, dy) moves (dx*a + dy*c, dx*b + dy*d) in page space
+_ROTATED_AXES = {
+    0: (1, 0, 0, 1),
+    90: (0, -1, 1, 0),
+    180: (-1, 0, 0, -1),
+    270: (0, 1, -1, 0)
+}
+
+
+def page_transform(canvas_width: int, canvas_height: int, geometry: tuple) -> tuple:
+    """
+    Affine transform from canvas coordinates to PyMuPDF page space.
+    
+    The canvas shows the page as displayed, so points are scaled to the
+    displayed size, then turned back by the page rotation. Page space starts
+    at the CropBox top-left, so CropBox and MediaBox offsets need no term of
+    their own (PyMuPDF applies them when writing content).
+    
+    Args:
+        canvas_width: Canvas width (from frontend)
+        canvas_height: Canvas height (from frontend)
+        geometry: (width, height, rotation) of the displayed page
+    
+    Returns:
+        Tuple (a, b, c, d, e, f): x' = x*a + y*c + e, y' = x*b + y*d + f
+    """
+    if canvas_width <= 0 or canvas_height <= 0:
+        return (0, 0, 0, 0, 0, 0)
+    
+    width, height, rotation = geometry
+    scale_x = width / canvas_width
+    scale_y = height / canvas_height
+    a, b, c, d = _ROTATED_AXES[rotation]
+    
+    # Where the displayed top-left corner lands in page space
+    e, f = {0: (0, 0), 90: (0, width), 180: (width, height), 270: (height, 0)}[rotation]
+    
+    return (a * scale_x, b * scale_x, c * scale_y, d * scale_y, e, f)
+
+
+def convert_coordinates_batch(points: list, page_geometry: tuple) -> list:
+    """
+    Convert canvas points on many pages to PyMuPDF page space in one pass.
+    
+    Transforms are built once per distinct (page geometry, canvas size) and
+    looked up per page index, so a global anchor on a 1000-page document of
+    identical pages costs one transform plus a multiply-add per page.
+    
+    Args:
+        points: List of (canvas_x, canvas_y, canvas_width, canvas_height, page_indexes)
+        page_geometry: Tuple of (width, height, rotation) per page
+    
+    Returns:
+        List with one list of (pdf_x, pdf_y) per point, in page_indexes order
+    """
+    by_canvas = {}  # (canvas_width, canvas_height) -> transform per page index
+    coordinates = []
+    for x, y, canvas_width, canvas_height, page_indexes in points:
+        transforms = by_canvas.get((canvas_width, canvas_height))
+        if transforms is None:
+            distinct = {}
+            for geometry in page_geometry:
+                if geometry not in distinct:
+                    distinct[geometry] = page_transform(canvas_width, canvas_height, geometry)
+            transforms = by_canvas[(canvas_width, canvas_height)] = [distinct[geometry] for geometry in page_geometry]
+        
+        point_coordinates = []
+        for page_index in page_indexes:
+            a, b, c, d, e, f = transforms[page_index]
+            point_coordinates.append((x * a + y * c + e, x * b + y * d + f))
+        coordinates.append(point_coordinates)
+    return coordinates
+
+
+def displayed_geometry(page: fitz.Page) -> tuple:
+    """(width, height, rotation) of a page as displayed, in points"""
+    rect = page.rect
+    return (rect.width, rect.height, page.rotation)
+
+
+def measure_page(page_num: int, page: fitz.Page) -> tuple:
+    """
+    Geometry row of a page for PageGeometry.store.
+    
+    Returns:
+        Tuple of (page_num, width, height, rotation, cropbox, mediabox),
+        boxes as (x0, y0, x1, y1) in points with a top-left origin
+    """
+    width, height, rotation = displayed_geometry(page)
+    return (page_num, width, height, rotation, tuple(page.cropbox), tuple(page.mediabox))
+
+
+def measure_document(doc: fitz.Document) -> list:
+    """Geometry rows of every page of an open document (for files indexed before geometry was stored)"""
+    return [measure_page(page_num, page) for page_num, page in enumerate(doc, start=1)]
+
+
 def get_pdf_page_count(pdf_bytes: bytes) -> int:
     """Get the number of pages in a PDF."""
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    with metrics.span('fitz_open'):
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
     return len(doc)
 
 
+def get_pdf_file_page_count(file_path: str) -> int:
+    """Get the number of pages in a stored PDF (opened by path, not read into memory)."""
+    with metrics.span('fitz_open'):
+        doc = fitz.open(file_path)
+    try:
+        return len(doc)
+    finally:
+        doc.close()
+
+
 def get_pdf_content_hash(pdf_bytes: bytes) -> str:
     """
     Generate a SHA-256 hash of the PDF content.
@@ -152,6 +541,72 @@ def get_pdf_content_hash(pdf_bytes: bytes) -> str:
     return hashlib.sha256(pdf_bytes).hexdigest()
 
 
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def get_stream_content_hash(stream, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    Generate a SHA-256 hash of a file-like object, reading it in chunks.
+    
+    Args:
+        stream: Readable binary file-like object (read from its current position)
+        chunk_size: Bytes read per chunk
+    
+    Returns:
+        SHA-256 hash string
+    """
+    sha = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        sha.update(chunk)
+    return sha.hexdigest()
+
+
+def spool_stream_to_file(stream, folder: str, chunk_size: int = HASH_CHUNK_SIZE) -> tuple:
+    """
+    Copy a file-like object to a temp file in folder while hashing it.
+    
+    The temp file lives in the destination folder so it can be moved into
+    place with an atomic os.replace(). The caller owns (and must remove or
+    rename) the temp file.
+    
+    Args:
+        stream: Readable binary file-like object
+        folder: Directory for the temp file
+        chunk_size: Bytes copied per chunk
+    
+    Returns:
+        Tuple of (temp_path, sha256 hex digest, size in bytes)
+    """
+    sha = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.part')
+    try:
+        with metrics.span('disk_write'), os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: stream.read(chunk_size), b''):
+                sha.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return temp_path, sha.hexdigest(), size
+
+
+def get_file_content_hash(file_path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    Generate a SHA-256 hash of a file on disk, reading it in chunks.
+    
+    Args:
+        file_path: Path to the file
+        chunk_size: Bytes read per chunk
+    
+    Returns:
+        SHA-256 hash string (same as get_pdf_content_hash of the file's bytes)
+    """
+    with open(file_path, 'rb') as f:
+        return get_stream_content_hash(f, chunk_size)
+
+
 def get_pdf_text_hash(pdf_bytes: bytes) -> str:
     """
     Generate a hash based on the text content of the PDF.
@@ -163,11 +618,83 @@ def get_pdf_text_hash(pdf_bytes: bytes) -> str:
     Returns:
         SHA-256 hash of extracted text
     """
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    all_text = ""
-    for page in doc:
-        all_text += page.get_text()
-    return hashlib.sha256(all_text.encode()).hexdigest()
+    with metrics.span('fitz_open'):
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    sha = hashlib.sha256()
+    with doc, metrics.span('extract_text'):
+        # Hash page by page instead of concatenating the whole document's text
+        for page in doc:
+            sha.update(page.get_text().encode())
+    return sha.hexdigest()
+
+
+def get_page_text_hash(text: str):
+    """
+    Hash of a page's text with whitespace normalized, so re-exports that only
+    change line breaks or spacing still match. None for pages without text.
+    """
+    normalized = ' '.join(text.split())
+    if not normalized:
+        return None
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def get_file_text_fingerprint(file_path: str) -> tuple:
+    """
+    Page count and text fingerprints of a stored PDF, in one pass.
+    
+    Returns:
+        Tuple of (total_pages, text_hash, page_hashes), as for get_file_page_index
+    """
+    return _scan_file(file_path, measure=False)[:3]
+
+
+def get_file_page_index(file_path: str) -> tuple:
+    """
+    Page count, text fingerprints and page geometry of a stored PDF, in one pass.
+    
+    Pages are extracted one at a time, so memory stays flat for large files.
+    The document hash chains the page hashes in order.
+    
+    Returns:
+        Tuple of (total_pages, text_hash, page_hashes, geometry): text_hash is
+        None when no page has text (e.g. scans), page_hashes is a list of
+        (page_num, page text hash) for pages with text, geometry is a list of
+        measure_page rows for every page
+    """
+    return _scan_file(file_path, measure=True)
+
+
+def _scan_file(file_path: str, measure: bool) -> tuple:
+    with metrics.span('fitz_open'):
+        doc = fitz.open(file_path)
+    
+    sha = hashlib.sha256()
+    page_hashes = []
+    geometry = []
+    with doc, metrics.span('extract_text'):
+        for page_num, page in enumerate(doc, start=1):
+            page_hash = get_page_text_hash(page.get_text())
+            if page_hash:
+                page_hashes.append((page_num, page_hash))
+                sha.update(page_hash.encode())
+            if measure:
+                geometry.append(measure_page(page_num, page))
+        total_pages = len(doc)
+    
+    return total_pages, (sha.hexdigest() if page_hashes else None), page_hashes, geometry
+
+
+# ============ PAGE RENDERING ============
+
+# Output formats for rendered pages: format name -> MIME type
+IMAGE_FORMATS = {
+    'png': 'image/png',
+    'jpeg': 'image/jpeg',
+    'webp': 'image/webp'
+}
+
+IMAGE_QUALITY = 85  # JPEG/WebP quality
 
 
 def render_page_as_image(pdf_bytes: bytes, page_num: int, dpi: int = 150) -> bytes:
@@ -182,15 +709,180 @@ def render_page_as_image(pdf_bytes: bytes, page_num: int, dpi: int = 150) -> byt
     Returns:
         PNG image as bytes
     """
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    with metrics.span('fitz_open'):
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    return render_document_page(doc, page_num, dpi)
+
+
+def render_document_page(doc: fitz.Document, page_num: int, dpi: int = 150,
+                         width: int = None, fmt: str = 'png') -> bytes:
+    """
+    Render a page of an already-open document as an image.
     
+    Args:
+        doc: Open fitz.Document (e.g. from the document pool)
+        page_num: Page number (1-indexed)
+        dpi: Resolution for rendering (ignored if width is given)
+        width: Target image width in pixels (for thumbnails)
+        fmt: "png", "jpeg" or "webp"
+    
+    Returns:
+        Image as bytes
+    """
     if page_num < 1 or page_num > len(doc):
         raise ValueError(f"Page {page_num} not found in PDF")
     
     page = doc[page_num - 1]
     
-    # Render page to image
-    mat = fitz.Matrix(dpi / 72, dpi / 72)  # Scale for DPI
-    pix = page.get_pixmap(matrix=mat)
+    # Scale to the requested width, or to the DPI
+    zoom = width / page.rect.width if width else dpi / 72
+    with metrics.span('rasterize'):
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+    
+    with metrics.span('encode'):
+        return encode_pixmap(pix, fmt)
+
+
+def render_file_pages(file_path: str, page_nums: list, dpi: int = 150,
+                      width: int = None, fmt: str = 'png') -> list:
+    """
+    Render several pages of a stored PDF (opened once). Safe to run in a process pool.
+    
+    Returns:
+        List of (page_num, image bytes) tuples
+    """
+    with metrics.span('fitz_open'):
+        doc = fitz.open(file_path)
+    try:
+        return [(page_num, render_document_page(doc, page_num, dpi, width, fmt)) for page_num in page_nums]
+    finally:
+        doc.close()
+
+
+# ============ PREVIEW OVERLAY ============
+# Previews draw anchor markers onto a cached page image instead of building
+# a red-text PDF, so a preview costs one cached render plus the overlay.
+
+MARKER_SIZE = 3  # Half-width of the anchor point marker, in pixels
+
+# Marked-up images are cached in memory: PNG decode + encode dominates the overlay
+PREVIEW_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+_page_geometry_cache = LRUCache(max_entries=PLAN_CACHE_SIZE)
+_preview_cache = LRUCache(max_bytes=PREVIEW_CACHE_MAX_BYTES)
+
+
+def get_page_geometry(content_hash: str, load) -> tuple:
+    """
+    Page geometry of a stored file, cached by content hash.
+    
+    Args:
+        content_hash: Content hash of the file
+        load: Zero-argument function returning the geometry tuple on a miss
+              (e.g. stored PageGeometry rows)
+    
+    Returns:
+        Tuple of (width, height, rotation) per page
+    """
+    geometry = _page_geometry_cache.get(content_hash)
+    if geometry is None:
+        geometry = load()
+        _page_geometry_cache.set(content_hash, geometry)
+    return geometry
+
+
+def draw_anchor_markers(image_bytes: bytes, plan: list, page_index: int, geometry: tuple) -> bytes:
+    """
+    Draw anchor markers onto a rendered page image.
+    
+    Each placement on the page gets a filled square at its anchor point and
+    an outline around the box its text occupies (after font, size and wrapping).
+    
+    Args:
+        image_bytes: Page image (e.g. PNG from the page cache)
+        plan: Placement plan from get_placement_plan (preview=True for red markers)
+        page_index: Page index (0-based)
+        geometry: (width, height, rotation) of the page (image scale = pixels / points)
     
-    return pix.tobytes("png")
+    Returns:
+        PNG bytes
+    """
+    with metrics.span('decode'):
+        pix = fitz.Pixmap(image_bytes)
+    width, height, _ = geometry
+    scale = pix.width / width
+    bounds = pix.irect
+    
+    # Plan points are in page space and the image shows the displayed page:
+    # undo the displayed -> page transform (its rotation part is orthonormal)
+    a, b, c, d, e, f = page_transform(width, height, geometry)
+    
+    def displayed(x, y):
+        return (x - e) * a + (y - f) * b, (x - e) * c + (y - f) * d
+    
+    def fill(x0, y0, x1, y1, color):
+        rect = fitz.IRect(int(x0), int(y0), int(x1) + 1, int(y1) + 1) & bounds
+        if not rect.is_empty:
+            pix.set_rect(rect, color)
+    
+    for entry_page, pdf_x, pdf_y, text, color, key, style in plan:
+        if entry_page != page_index:
+            continue
+        
+        pdf_x, pdf_y = displayed(pdf_x, pdf_y)
+        rgb = tuple(int(c * 255) for c in color)
+        font, font_size, align, max_width, auto_shrink = style
+        font_size, lines = layout_text(text, font, font_size, align, max_width, auto_shrink)
+        
+        # Text box outline per line (ascent ~ font size above the baseline)
+        for dx, dy, line in lines:
+            left = (pdf_x + dx) * scale
+            right = left + text_width(line, font) * font_size * scale
+            top = (pdf_y + dy - font_size) * scale
+            bottom = (pdf_y + dy + font_size * 0.25) * scale
+            fill(left, top, right, top, rgb)
+            fill(left, bottom, right, bottom, rgb)
+            fill(left, top, left, bottom, rgb)
+            fill(right, top, right, bottom, rgb)
+        
+        # Anchor point
+        x, y = pdf_x * scale, pdf_y * scale
+        fill(x - MARKER_SIZE, y - MARKER_SIZE, x + MARKER_SIZE, y + MARKER_SIZE, rgb)
+    
+    with metrics.span('encode'):
+        return pix.tobytes('png')
+
+
+def get_anchor_preview(cache_key: tuple, build) -> bytes:
+    """
+    Get a marked-up page image from the preview cache, calling build() on a miss.
+    
+    Args:
+        cache_key: Page image key plus the anchor set identity (e.g. plan_key) and canvas size
+        build: Zero-argument function returning PNG bytes
+    """
+    image_bytes = _preview_cache.get(cache_key)
+    if image_bytes is None:
+        image_bytes = build()
+        _preview_cache.set(cache_key, image_bytes)
+    return image_bytes
+
+
+def encode_pixmap(pix: fitz.Pixmap, fmt: str = 'png', quality: int = IMAGE_QUALITY) -> bytes:
+    """
+    Encode a pixmap as PNG, JPEG or WebP.
+    
+    PyMuPDF encodes PNG and JPEG natively; WebP goes through Pillow.
+    """
+    if fmt == 'png':
+        return pix.tobytes('png')
+    if fmt == 'jpeg':
+        return pix.tobytes('jpeg', jpg_quality=quality)
+    if fmt == 'webp':
+        from PIL import Image
+        mode = 'RGBA' if pix.alpha else 'RGB'
+        image = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+        buffer = io.BytesIO()
+        image.save(buffer, format='WEBP', quality=quality)
+        return buffer.getvalue()
+    raise ValueError(f"Unsupported image format: {fmt}")
@@ -0,0 +1,179 @@
+"""
+Fill Result Cache - Filled PDFs for repeated identical auto-fill requests
+Tier 1: in-memory LRU bounded by bytes. Entries evicted from memory (and
+results too large for it) spill to files under FILL_CACHE_FOLDER, which is
+bounded by FILL_CACHE_DISK_MAX_BYTES (oldest files removed first).
+
+Keys hash everything that determines the output: input bytes, anchor set
+(saved PDF + anchor revision, or the anchors themselves), canvas size,
+preview flag, fill values and save options. A key therefore never goes
+stale and doubles as a stable ETag.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from .cache import LRUCache
+from .metrics import metrics
+
+
+class FillResultCache:
+    """Memory + disk cache of filled PDFs"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.max_disk_bytes = 0
+        self._memory = LRUCache(max_bytes=0)
+        self._disk_bytes = None  # Estimated size of the disk tier (scanned on first spill)
+        self._disk_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Bind cache to a Flask app and size both tiers from config"""
+        self.app = app
+        app.config['FILL_CACHE_FOLDER'] = (app.config.get('FILL_CACHE_FOLDER')
+                                           or os.path.join(app.config['UPLOAD_FOLDER'], 'cache', 'fills'))
+        self.enabled = app.config['FILL_CACHE_ENABLED']
+        self.max_disk_bytes = app.config['FILL_CACHE_DISK_MAX_BYTES']
+        self._memory = LRUCache(max_bytes=app.config['FILL_CACHE_MAX_BYTES'], on_evict=self._spill)
+        self._disk_bytes = None
+        app.extensions['fill_cache'] = self
+
+    @property
+    def folder(self) -> str:
+        return self.app.config['FILL_CACHE_FOLDER']
+
+    @staticmethod
+    def make_key(content_hash: str, anchor_set, canvas_width: int, canvas_height: int,
+                 preview: bool, values: dict = None, save_options: dict = None) -> str:
+        """
+        Cache key for a fill request.
+
+        Args:
+            content_hash: SHA-256 of the input PDF
+            anchor_set: Saved PDF plan_key (pdf id + anchor revision), or the anchors list
+            values: Placeholder values (None = stamp anchor text)
+            save_options: Output save options
+
+        Returns:
+            Hex digest (also used as file name and ETag)
+        """
+        identity = json.dumps(
+            [content_hash, anchor_set, canvas_width, canvas_height, bool(preview), values, save_options or {}],
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    @staticmethod
+    def etag(key: str) -> str:
+        """Strong ETag for a key (the same request always yields the same bytes)"""
+        return f'fill-{key[:32]}'
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, key[:2], f'{key}.pdf')
+
+    def get(self, key: str):
+        """Get filled PDF bytes from memory, then disk (promoting to memory). None on miss."""
+        data = self._memory.get(key)
+        if data is not None:
+            return data
+
+        path = self._path(key)
+        try:
+            with metrics.span('disk_read'), open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # Recently used files are evicted last
+        except OSError:
+            return None
+
+        self._memory.set(key, data)
+        return data
+
+    def get_or_fill(self, key: str, fill):
+        """
+        Get filled PDF bytes, calling fill() and caching the result on a miss.
+
+        Args:
+            key: Cache key from make_key()
+            fill: Zero-argument function returning PDF bytes
+
+        Returns:
+            Tuple of (PDF bytes, True if served from cache)
+        """
+        if not self.enabled:
+            return fill(), False
+
+        data = self.get(key)
+        if data is not None:
+            return data, True
+
+        data = fill()
+        if len(data) > self._memory.max_bytes:
+            self._spill(key, data)
+        else:
+            self._memory.set(key, data)
+        return data, False
+
+    def _spill(self, key: str, data: bytes):
+        """Write an entry to the disk tier (entries already on disk are kept)"""
+        if not self.max_disk_bytes or len(data) > self.max_disk_bytes:
+            return
+
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temp file then rename, so readers never see partial files
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with metrics.span('disk_write'), os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+            else:
+                self._disk_bytes += len(data)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._prune_disk()
+
+    def _disk_entries(self) -> list:
+        """(mtime, size, path) of every file in the disk tier"""
+        entries = []
+        for root, _, files in os.walk(self.folder):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # Removed by another worker
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _prune_disk(self):
+        """Remove least recently used files until the disk tier is at 80% of its limit"""
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_disk_bytes * 0.8
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+        self._disk_bytes = total
+
+
+fill_cache = FillResultCache()
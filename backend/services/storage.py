@@ -0,0 +1,200 @@
+"""
+Blob Storage - Content-addressed storage for uploaded PDFs
+Files are stored once per SHA-256 content hash in sharded directories
+(ab/cd/<hash>.pdf), so the same contract uploaded for several providers is
+stored once. ProviderPDF rows are the references: bytes are deleted only
+when the last row with that content_hash is gone.
+
+Backends:
+    local - files under BLOB_FOLDER (default)
+    s3    - any S3-compatible service (AWS S3, MinIO, ...), with a local
+            read-through cache so PyMuPDF can open files by path.
+            Requires boto3.
+"""
+import os
+from abc import ABC, abstractmethod
+
+from .metrics import metrics
+
+
+class BlobStorage(ABC):
+    """Storage backend interface (subclasses must implement every method)"""
+
+    @abstractmethod
+    def locator(self, content_hash: str) -> str:
+        """Value stored in ProviderPDF.file_path for a blob"""
+        pass
+
+    @abstractmethod
+    def owns(self, file_path: str) -> bool:
+        """True if file_path is a locator from this backend (not a legacy flat file)"""
+        pass
+
+    @abstractmethod
+    def put(self, temp_path: str, content_hash: str) -> str:
+        """Store a local temp file under its hash (consumes temp_path). Returns locator."""
+        pass
+
+    @abstractmethod
+    def exists(self, content_hash: str) -> bool:
+        pass
+
+    @abstractmethod
+    def local_path(self, content_hash: str) -> str:
+        """Path on the local filesystem that can be opened or streamed"""
+        pass
+
+    @abstractmethod
+    def delete(self, content_hash: str):
+        pass
+
+
+def _shard(content_hash: str) -> str:
+    return os.path.join(content_hash[:2], content_hash[2:4], f'{content_hash}.pdf')
+
+
+class LocalBlobStorage(BlobStorage):
+    """Blobs in sharded directories on the local filesystem"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def locator(self, content_hash: str) -> str:
+        return os.path.join(self.root, _shard(content_hash))
+
+    def owns(self, file_path: str) -> bool:
+        return bool(file_path) and os.path.abspath(file_path).startswith(os.path.abspath(self.root) + os.sep)
+
+    def put(self, temp_path: str, content_hash: str) -> str:
+        path = self.locator(content_hash)
+        if os.path.exists(path):
+            # Already stored (deduplicated)
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        return path
+
+    def exists(self, content_hash: str) -> bool:
+        return os.path.exists(self.locator(content_hash))
+
+    def local_path(self, content_hash: str) -> str:
+        return self.locator(content_hash)
+
+    def delete(self, content_hash: str):
+        path = self.locator(content_hash)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class S3BlobStorage(BlobStorage):
+    """Blobs in an S3-compatible bucket, cached locally for reads"""
+
+    def __init__(self, bucket: str, cache_root: str, prefix: str = 'pdfs/', endpoint_url: str = None):
+        import boto3  # Optional dependency, only needed for this backend
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.cache = LocalBlobStorage(cache_root)
+        self.client = boto3.client('s3', endpoint_url=endpoint_url)
+
+    def _key(self, content_hash: str) -> str:
+        return self.prefix + _shard(content_hash).replace(os.sep, '/')
+
+    def locator(self, content_hash: str) -> str:
+        return f's3://{self.bucket}/{self._key(content_hash)}'
+
+    def owns(self, file_path: str) -> bool:
+        return bool(file_path) and file_path.startswith(f's3://{self.bucket}/')
+
+    def put(self, temp_path: str, content_hash: str) -> str:
+        if not self.exists(content_hash):
+            self.client.upload_file(temp_path, self.bucket, self._key(content_hash))
+        # Keep the bytes in the local cache for immediate reads
+        self.cache.put(temp_path, content_hash)
+        return self.locator(content_hash)
+
+    def exists(self, content_hash: str) -> bool:
+        if self.cache.exists(content_hash):
+            return True
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(content_hash))
+            return True
+        except self.client.exceptions.ClientError:
+            return False
+
+    def local_path(self, content_hash: str) -> str:
+        path = self.cache.local_path(content_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f'{path}.{os.getpid()}.part'
+            self.client.download_file(self.bucket, self._key(content_hash), temp_path)
+            os.replace(temp_path, path)
+        return path
+
+    def delete(self, content_hash: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(content_hash))
+        self.cache.delete(content_hash)
+
+
+class BlobStore:
+    """App-bound facade over the configured storage backend"""
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Create the backend selected by STORAGE_BACKEND"""
+        app.config['BLOB_FOLDER'] = app.config.get('BLOB_FOLDER') or os.path.join(app.config['UPLOAD_FOLDER'], 'blobs')
+        backend = app.config['STORAGE_BACKEND']
+        if backend == 'local':
+            self.backend = LocalBlobStorage(app.config['BLOB_FOLDER'])
+        elif backend == 's3':
+            self.backend = S3BlobStorage(
+                bucket=app.config['S3_BUCKET'],
+                cache_root=app.config['BLOB_FOLDER'],
+                prefix=app.config['S3_PREFIX'],
+                endpoint_url=app.config['S3_ENDPOINT_URL']
+            )
+        else:
+            raise ValueError(f'Unknown STORAGE_BACKEND: {backend}')
+        app.extensions['blob_store'] = self
+
+    def locator(self, content_hash: str) -> str:
+        return self.backend.locator(content_hash)
+
+    def owns(self, file_path: str) -> bool:
+        return self.backend.owns(file_path)
+
+    def put(self, temp_path: str, content_hash: str) -> str:
+        with metrics.span('blob_put'):
+            return self.backend.put(temp_path, content_hash)
+
+    def exists(self, content_hash: str) -> bool:
+        return self.backend.exists(content_hash)
+
+    def local_path(self, content_hash: str) -> str:
+        return self.backend.local_path(content_hash)
+
+    def delete(self, content_hash: str):
+        self.backend.delete(content_hash)
+
+    def resolve(self, provider_pdf):
+        """
+        Local path to a PDF record's bytes, or None if missing.
+
+        Handles both blob-store records and legacy flat files in UPLOAD_FOLDER.
+        """
+        with metrics.span('blob_resolve'):
+            if self.owns(provider_pdf.file_path):
+                if self.exists(provider_pdf.content_hash):
+                    return self.local_path(provider_pdf.content_hash)
+                return None
+            if provider_pdf.file_path and os.path.exists(provider_pdf.file_path):
+                return provider_pdf.file_path
+            return None
+
+
+blob_store = BlobStore()
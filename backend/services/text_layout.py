@@ -0,0 +1,153 @@
+"""
+Text Layout - Font cache and text measurement for anchor filling
+Fonts are loaded once per worker process and glyph advances are kept in
+per-font tables; line widths and whole layouts are memoized, so laying out
+a value costs a few dictionary lookups on the hot path.
+
+Output uses the PDF Base-14 fonts, which viewers provide, so nothing is
+embedded in filled documents.
+"""
+import functools
+
+import fitz  # PyMuPDF
+
+# Anchor font names -> PyMuPDF Base-14 font codes
+FONTS = {
+    'helvetica': 'helv',
+    'helvetica-bold': 'hebo',
+    'helvetica-oblique': 'heit',
+    'helvetica-boldoblique': 'hebi',
+    'times': 'tiro',
+    'times-bold': 'tibo',
+    'times-italic': 'tiit',
+    'times-bolditalic': 'tibi',
+    'courier': 'cour',
+    'courier-bold': 'cobo',
+    'courier-oblique': 'coit',
+    'courier-boldoblique': 'cobi',
+}
+
+ALIGNMENTS = ('left', 'center', 'right')
+
+DEFAULT_FONT = 'helvetica'
+DEFAULT_FONT_SIZE = 10
+MIN_FONT_SIZE = 4  # Auto-shrink never goes below this
+MAX_FONT_SIZE = 200
+LINE_HEIGHT = 1.2  # Multiple of the font size
+
+# (font, size, align, max_width, auto_shrink) for anchors without style settings
+DEFAULT_STYLE = (DEFAULT_FONT, DEFAULT_FONT_SIZE, 'left', None, False)
+
+_advances = {}  # Font name -> {character: advance at size 1}
+
+
+def anchor_style(anchor: dict) -> tuple:
+    """
+    Normalized style of an anchor dictionary.
+
+    Raises:
+        ValueError: If a setting is invalid
+
+    Returns:
+        Tuple of (font, font_size, align, max_width, auto_shrink); max_width
+        is in canvas units (None = unbounded)
+    """
+    font = anchor.get('font') or DEFAULT_FONT
+    if font not in FONTS:
+        raise ValueError(f'Unknown font "{font}" (expected one of: {", ".join(FONTS)})')
+
+    font_size = anchor.get('fontSize') or DEFAULT_FONT_SIZE
+    if not isinstance(font_size, (int, float)) or not MIN_FONT_SIZE <= font_size <= MAX_FONT_SIZE:
+        raise ValueError(f'fontSize must be between {MIN_FONT_SIZE} and {MAX_FONT_SIZE}')
+
+    align = anchor.get('align') or 'left'
+    if align not in ALIGNMENTS:
+        raise ValueError(f'align must be one of: {", ".join(ALIGNMENTS)}')
+
+    max_width = anchor.get('maxWidth') or None
+    if max_width is not None and (not isinstance(max_width, (int, float)) or max_width <= 0):
+        raise ValueError('maxWidth must be a positive number')
+
+    return (font, font_size, align, max_width, bool(anchor.get('autoShrink')))
+
+
+@functools.lru_cache(maxsize=None)
+def get_font(font_name: str) -> fitz.Font:
+    """Loaded font for measuring (one per worker process)"""
+    return fitz.Font(FONTS[font_name])
+
+
+def preload_fonts():
+    """
+    Load every font and its printable ASCII advances up front, e.g. in a
+    preforking server master so workers share them copy-on-write.
+    """
+    for font_name in FONTS:
+        font = get_font(font_name)
+        table = _advances.setdefault(font_name, {})
+        for code in range(32, 127):
+            table.setdefault(chr(code), font.glyph_advance(code))
+
+
+@functools.lru_cache(maxsize=8192)
+def text_width(text: str, font_name: str) -> float:
+    """Width of a line of text at font size 1 (multiply by the font size)"""
+    table = _advances.setdefault(font_name, {})
+    width = 0.0
+    for char in text:
+        advance = table.get(char)
+        if advance is None:
+            advance = table[char] = get_font(font_name).glyph_advance(ord(char))
+        width += advance
+    return width
+
+
+def _wrap(line: str, font_name: str, font_size: float, max_width: float) -> list:
+    """Greedy word wrap (a word wider than max_width gets a line of its own)"""
+    words = line.split(' ')
+    lines = []
+    current = words[0]
+    for word in words[1:]:
+        candidate = f'{current} {word}'
+        if text_width(candidate, font_name) * font_size <= max_width:
+            current = candidate
+        else:
+            lines.append(current)
+            current = word
+    lines.append(current)
+    return lines
+
+
+@functools.lru_cache(maxsize=4096)
+def layout_text(text: str, font_name: str, font_size: float, align: str,
+                max_width: float = None, auto_shrink: bool = False) -> tuple:
+    """
+    Lay out text relative to an anchor point (baseline of the first line).
+
+    Lines are split on newlines. With max_width (points), text is aligned in
+    the box [x, x + max_width] and either wrapped or, with auto_shrink,
+    drawn smaller until the widest line fits. Without it, center and right
+    alignment are relative to the anchor point.
+
+    Returns:
+        Tuple of (font_size, ((dx, dy, line), ...))
+    """
+    lines = text.split('\n')
+
+    if max_width:
+        if auto_shrink:
+            widest = max(text_width(line, font_name) for line in lines)
+            if widest * font_size > max_width:
+                font_size = max(MIN_FONT_SIZE, max_width / widest)
+        else:
+            lines = [wrapped for line in lines for wrapped in _wrap(line, font_name, font_size, max_width)]
+
+    factor = {'left': 0, 'center': 0.5, 'right': 1}[align]
+    box = max_width or 0
+
+    placed = []
+    for index, line in enumerate(lines):
+        dx = (box - text_width(line, font_name) * font_size) * factor if factor else 0
+        placed.append((dx, index * font_size * LINE_HEIGHT, line))
+
+    return font_size, tuple(placed)
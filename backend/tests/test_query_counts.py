@@ -0,0 +1,96 @@
+"""
+Query-count regression tests for the provider, PDF and anchor listings.
+
+Each endpoint must issue a fixed number of SQL statements, however many
+providers, PDFs and anchors exist (no N+1 queries). Run from backend/:
+    python -m pytest tests
+"""
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from config import Config, config
+from database import db, init_schema
+from models import Provider, ProviderPDF, Anchor
+
+# Statements per request (counts only grow if an endpoint starts loading per row)
+EXPECTED_QUERIES = {
+    '/api/providers': 3,  # providers, PDFs (selectin), anchors (selectin)
+    '/api/providers?include=': 2,  # providers, GROUP BY counts
+    '/api/providers/{provider_id}': 3,
+    '/api/providers/{provider_id}/pdfs': 3,  # provider, PDFs, anchors (selectin)
+    '/api/providers/{provider_id}/pdfs?include=': 3,  # provider, PDFs, GROUP BY anchor counts
+    '/api/providers/{provider_id}/anchors': 2,  # provider, anchors joined to PDFs
+}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """App on a temp SQLite database (no job workers, so only request queries run)"""
+    class QueryCountConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "queries.sqlite"}'
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        SQLALCHEMY_BINDS = {}
+        UPLOAD_FOLDER = str(tmp_path)
+        JOB_WORKERS = 0
+
+    monkeypatch.setitem(config, 'query_count', QueryCountConfig)
+    application = create_app('query_count')
+    init_schema(application)
+    yield application
+    with application.app_context():
+        db.engine.dispose()
+
+
+def seed(app, providers: int, pdfs: int, anchors: int) -> int:
+    """Create providers x PDFs x anchors. Returns the first provider's id."""
+    with app.app_context():
+        for p in range(providers):
+            provider = Provider(name=f'Provider {p}')
+            db.session.add(provider)
+            for d in range(pdfs):
+                content_hash = f'{p:032x}{d:032x}'
+                provider_pdf = ProviderPDF(
+                    provider=provider,
+                    filename=f'contract_{d}.pdf',
+                    file_path=f'/tmp/{content_hash}.pdf',
+                    content_hash=content_hash,
+                    total_pages=2
+                )
+                db.session.add(provider_pdf)
+                for a in range(anchors):
+                    db.session.add(Anchor(pdf=provider_pdf, text=f'{{{{field_{a}}}}}', x=10 * a, y=20, page='1'))
+        db.session.commit()
+        return db.session.query(db.func.min(Provider.id)).scalar()
+
+
+def count_queries(app, url: str) -> int:
+    """Number of SQL statements executed while serving GET url"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = app.test_client().get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return len(statements)
+
+
+@pytest.mark.parametrize('providers,pdfs,anchors', [(1, 1, 1), (3, 2, 2), (6, 5, 4)])
+def test_listing_query_counts_are_fixed(app, providers, pdfs, anchors):
+    provider_id = seed(app, providers, pdfs, anchors)
+
+    counts = {
+        path: count_queries(app, path.format(provider_id=provider_id))
+        for path in EXPECTED_QUERIES
+    }
+
+    assert counts == EXPECTED_QUERIES